@@ -1,13 +1,15 @@
+import logging
 import os
 from flask import Flask
 from datetime import timedelta
 from dotenv import load_dotenv
-from .models import db, User, Log, QSO, Park, QsoPark, DailyMultiplier
+from .models import db, User, Operator, Log, QSO, Park, QsoPark, DailyMultiplier, ImportJob, Upload, OperatorScore, DayParkScore
 
 load_dotenv()
 
-def create_app():
-    app = Flask(__name__, instance_relative_config=True)
+def create_app(instance_path=None):
+    # instance_path overrides the default instance/ folder (benchmarks use a scratch one)
+    app = Flask(__name__, instance_relative_config=True, instance_path=instance_path)
 
     # Ensure instance folder exists
     try:
@@ -19,7 +21,49 @@ def create_app():
     db_path = os.path.join(app.instance_path, "parkmas.db")
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+    # Pragmas for every SQLite connection (SQLITE_* settings, see
+    # app/pragmas.py); WAL lets readers work during a long import
+    from .pragmas import pragmas_from_env
+    app.config["SQLITE_PRAGMAS"] = pragmas_from_env()
+
+    # Import job queue gets its own file so progress writes never
+    # wait on an import's write transaction
+    jobs_path = os.path.join(app.instance_path, "jobs.db")
+    app.config["SQLALCHEMY_BINDS"] = {"jobs": f"sqlite:///{jobs_path}"}
+
+    # Run a background import worker thread in this process. On by
+    # default for the web server (gunicorn, python run.py), off under
+    # the flask command so one-off CLI runs don't pick up queued jobs;
+    # IMPORT_WORKER=1/0 overrides either (e.g. for flask run)
+    cli = os.getenv("FLASK_RUN_FROM_CLI") == "true"
+    app.config["IMPORT_WORKER"] = os.getenv("IMPORT_WORKER", "0" if cli else "1") == "1"
+
+    # Engine behind the materialized standings: "python" (score_qsos_for_operator),
+    # "columnar" (NumPy) or "sql" (window functions in SQLite)
+    app.config["SCORING_ENGINE"] = os.getenv("SCORING_ENGINE", "python")
+    if app.config["SCORING_ENGINE"] == "columnar":
+        # Fail at startup, not on the first import or rescore
+        from .scoring_columnar import require_numpy
+        require_numpy()
+
+    # Processes used by full rescores (CLI and background job); 1 scores
+    # in-process. Each spawned worker costs close to a second of startup
+    # while a serial rescore of 20k QSOs takes ~0.3s, so only very large
+    # contests gain from more (measure with benchmarks/rescore_parallel.py)
+    app.config["RESCORE_WORKERS"] = int(os.getenv("RESCORE_WORKERS", 1))
+
+    # Live /leaders/stream connections per process; each holds a gunicorn
+    # thread, so keep this well under --threads
+    app.config["LEADERS_STREAM_LIMIT"] = int(os.getenv("LEADERS_STREAM_LIMIT", 4))
     
+    # Scoring/import trace (the "parkmas" loggers, see app/trace.py) is off
+    # unless LOG_LEVEL is set; LOG_LEVEL=DEBUG logs every QSO's score
+    log_level = os.getenv("LOG_LEVEL")
+    if log_level:
+        logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s %(message)s")
+        logging.getLogger("parkmas").setLevel(log_level.upper())
+
     # Load secret key from environment or use dev key
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "devkey")
     
@@ -28,11 +72,16 @@ def create_app():
 
     db.init_app(app)
 
+    from . import pragmas
+    pragmas.init_app(app)
+
     # -----------------------------------------
-    # Create all tables on startup
+    # Create all tables and migrate on startup
+    # (one worker at a time, see app/migrations.py)
     # -----------------------------------------
     with app.app_context():
-        db.create_all()
+        from .migrations import migrate
+        migrate(app)
 
     # -----------------------------------------
     # Jinja Filters
@@ -56,6 +105,24 @@ def create_app():
     from .client_auth import setup_auth_routes
     setup_auth_routes(app)
 
+    # -----------------------------------------
+    # Leaderboard snapshot: rewritten after every data change, and
+    # written now if the current version has none yet
+    # -----------------------------------------
+    from . import snapshot
+    snapshot.init_app(app)
+    snapshot.write_snapshot(app)
+
+    # -----------------------------------------
+    # CLI commands (flask parkmas ...)
+    # -----------------------------------------
+    from .cli import parkmas_cli
+    app.cli.add_command(parkmas_cli)
+
+    if app.config["IMPORT_WORKER"]:
+        from .jobs import start_worker
+        start_worker(app)
+
     print("Using DB:", db_path)
     
     return app
\ No newline at end of file
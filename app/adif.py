@@ -0,0 +1,172 @@
+"""
+Streaming ADIF reader for Parkmas.
+
+Reads ADIF files in fixed-size chunks and yields one record at a time,
+so memory use stays flat no matter how large the uploaded log is.
+Field names are returned in lower case and empty fields are dropped.
+"""
+
+# Characters read from the file per refill
+CHUNK_SIZE = 64 * 1024
+
+ALLOWED_EXTENSIONS = {"adi", "adif"}
+
+
+class ADIFReader:
+    """
+    Incremental ADIF tokenizer over an open text file.
+
+    Iterating yields each QSO record as a dict with lowercase keys.
+    The raw header text (everything before <EOH>) is available as
+    `header` once the first record has been read, or None if the
+    file has no header.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._eof = False
+        self._header_parts = None
+        self.header = None
+
+    def __iter__(self):
+        record = {}
+        for name, value in self._fields(keep_values=True):
+            if name == "eor":
+                if record:
+                    yield record
+                record = {}
+            elif value:
+                record[name] = value
+
+    def count(self):
+        """Count records without building dicts or slicing field values."""
+        count = 0
+        has_fields = False
+        for name, length in self._fields(keep_values=False):
+            if name == "eor":
+                count += has_fields
+                has_fields = False
+            elif length:
+                has_fields = True
+        return count
+
+    # -----------------------------
+    # TOKENIZER
+    # -----------------------------
+    def _fill(self, pos):
+        """Drop consumed text before pos and read one more chunk."""
+        if self._header_parts is not None:
+            self._header_parts.append(self._buf[:pos])
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+        self._buf = self._buf[pos:] + chunk
+
+    def _fields(self, keep_values):
+        """
+        Yield (name, value) for every data-specifier after the header,
+        plus ("eor", None) at each end of record. When keep_values is
+        False the value's length is yielded instead of the value.
+        """
+        self._header_parts = None
+        while not self._eof and not self._buf.strip():
+            self._fill(len(self._buf))
+
+        # A file starting with anything other than "<" has a header,
+        # which is collected raw until <EOH>. One starting with "<" may
+        # still open with header fields (<ADIF_VER:5>3.1.0<EOH>): its
+        # fields are held back until an <EOH> (a header) or an <EOR> (a
+        # first record) says which they were.
+        self._header_parts = []
+        maybe_header = self._buf.lstrip().startswith("<")
+        pending = []
+
+        pos = 0
+        while True:
+            lt = self._buf.find("<", pos)
+            while lt == -1 and not self._eof:
+                self._fill(len(self._buf))
+                pos = 0
+                lt = self._buf.find("<")
+            if lt == -1:
+                break
+
+            gt = self._buf.find(">", lt)
+            while gt == -1 and not self._eof:
+                self._fill(lt)
+                pos = lt = 0
+                gt = self._buf.find(">")
+            if gt == -1:
+                break
+
+            spec = self._buf[lt + 1:gt].split(":")
+            name = spec[0].strip().lower()
+
+            if name in ("eoh", "eor"):
+                pos = gt + 1
+                if maybe_header and name == "eor":
+                    # No header after all
+                    maybe_header = False
+                    self._header_parts = None
+                    yield from pending
+                    pending = None
+                if self._header_parts is not None:
+                    if name == "eoh":
+                        maybe_header = False
+                        pending = None
+                        self._header_parts.append(self._buf[:lt])
+                        self.header = "".join(self._header_parts).strip()
+                        self._header_parts = None
+                        self._buf = self._buf[pos:]
+                        pos = 0
+                    continue
+                yield name, None
+                continue
+
+            try:
+                length = int(spec[1]) if len(spec) > 1 else None
+            except ValueError:
+                length = None
+            if length is None or length < 0:
+                # Not a data-specifier; skip over it
+                pos = gt + 1
+                continue
+
+            end = gt + 1 + length
+            while len(self._buf) < end and not self._eof:
+                self._fill(lt)
+                end -= lt
+                gt -= lt
+                lt = 0
+
+            pos = end
+            if maybe_header:
+                pending.append((name, self._buf[gt + 1:end] if keep_values else length))
+            elif self._header_parts is None:
+                yield name, self._buf[gt + 1:end] if keep_values else length
+
+
+def open_adif(path):
+    """Open an ADIF file for reading with the encoding uploads are saved in."""
+    return open(path, "r", encoding="utf-8")
+
+
+def read_adif(path):
+    """Yield each record of the ADIF file at path as a lowercase-key dict."""
+    with open_adif(path) as f:
+        yield from ADIFReader(f)
+
+
+def count_records(path):
+    """Count the records in the ADIF file at path."""
+    with open_adif(path) as f:
+        return ADIFReader(f).count()
+
+
+def write_record(f, record):
+    """Write one record as uppercase data-specifiers followed by <EOR>."""
+    for k, v in record.items():
+        f.write(f"<{k.upper()}:{len(v)}>{v}")
+    f.write("<EOR>\n")
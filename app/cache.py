@@ -0,0 +1,151 @@
+"""
+Cross-worker page cache.
+
+Rendered pages are stored in instance/cache.db (plain sqlite3, no ORM)
+keyed by name and tagged with the data version they were built from.
+Every gunicorn worker shares the file, so a page is rendered once per
+data change instead of once per worker. The version is a counter in the
+main database (data_version) that writers bump in the same transaction
+as their change; a cached page from any older version is a miss.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app as app, session
+from sqlalchemy import text
+
+from app import db
+from app.pragmas import apply_pragmas
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_cache (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    body BLOB NOT NULL
+)
+"""
+
+
+# -----------------------------
+# DATA VERSION
+# -----------------------------
+def current_version():
+    """The committed data version (0 before the first change)."""
+    version = db.session.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
+    return version or 0
+
+
+def version_changed_at():
+    """Unix timestamp of the last data change, or None."""
+    return db.session.execute(text("SELECT changed_at FROM data_version WHERE id = 1")).scalar()
+
+
+# Set in session.info by bump_data_version; after-commit hooks (the
+# leaderboard snapshot) check it to run only for data changes
+DATA_CHANGED = "data_version_bumped"
+
+
+def bump_data_version():
+    """Increment the data version inside the caller's transaction."""
+    db.session.info[DATA_CHANGED] = True
+    db.session.execute(
+        text("""
+            INSERT INTO data_version (id, version, changed_at) VALUES (1, 1, :now)
+            ON CONFLICT (id) DO UPDATE SET version = version + 1, changed_at = :now
+        """),
+        {"now": time.time()},
+    )
+
+
+# -----------------------------
+# PAGE STORE
+# -----------------------------
+# Each thread keeps its connection to cache.db (per instance path) open;
+# reopened after a fork, since sqlite3 connections can't cross one
+_local = threading.local()
+
+# cache.db paths whose table this process has already created
+_schema_ready = set()
+
+
+def _connect():
+    path = os.path.join(app.instance_path, "cache.db")
+    if getattr(_local, "pid", None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.conns = {}
+
+    conn = _local.conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5)
+        apply_pragmas(conn, app.config["SQLITE_PRAGMAS"])
+        if path not in _schema_ready:
+            conn.execute(_SCHEMA)
+            _schema_ready.add(path)
+        _local.conns[path] = conn
+    return conn
+
+
+def get(key, version):
+    """Return the cached body for key if it was built at version, else None."""
+    row = _connect().execute(
+        "SELECT body FROM page_cache WHERE key = ? AND version = ?", (key, version)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def put(key, version, body):
+    """Store body for key at version, replacing any older copy."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO page_cache (key, version, body) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET version = excluded.version, body = excluded.body "
+            "WHERE excluded.version >= page_cache.version",
+            (key, version, body),
+        )
+
+
+def clear():
+    with _connect() as conn:
+        conn.execute("DELETE FROM page_cache")
+
+
+def page_key(name):
+    """
+    Cache key for a page that extends base.html. The nav bar depends on
+    whether the visitor is logged in and an admin, so each gets its own copy.
+    """
+    if session.get("user_is_admin"):
+        nav = "admin"
+    elif session.get("user"):
+        nav = "user"
+    else:
+        nav = "anon"
+    return f"{name}:{nav}"
+
+
+def cached_page(name, render):
+    """
+    Return the page for the current data version, calling render() to
+    build (and store) it only on a miss.
+    """
+    return cached(page_key(name), render)
+
+
+def cached(key, build):
+    """
+    Return the body stored under key for the current data version,
+    calling build() to create (and store) it only on a miss. For
+    responses that do not depend on the visitor, e.g. JSON.
+    """
+    version = current_version()
+
+    body = get(key, version)
+    if body is None:
+        body = build()
+        put(key, version, body)
+    return body
@@ -0,0 +1,203 @@
+"""
+Parkmas maintenance commands, available as `flask parkmas <command>`.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app as app
+from flask.cli import AppGroup
+
+from app import db
+from app.adif import ALLOWED_EXTENSIONS
+from app.importer import (
+    bulk_insert_qsos, create_log, load_park_ids, mark_upload_imported, parse_adif_file,
+)
+from app.models import Log
+from app.standings import (
+    SCORING_ENGINES, compare_results, operator_name, recompute_operator, rescore_all,
+    score_all, scoring_engine, verify_standings,
+)
+
+parkmas_cli = AppGroup("parkmas", help="Parkmas maintenance commands.")
+
+
+def _parse_for_import(path):
+    """Process-pool entry point: hash and parse one file, no database access."""
+    sha256, first, parsed = parse_adif_file(path)
+    return os.path.basename(path), sha256, first, parsed
+
+
+@parkmas_cli.command("import-dir")
+@click.argument("directory", required=False, type=click.Path(exists=True, file_okay=False))
+@click.option("--workers", "-w", default=os.cpu_count() or 1, show_default=True,
+              help="Processes used to parse files.")
+@click.option("--commit-every", default=20000, show_default=True,
+              help="Commit after roughly this many QSOs.")
+@click.option("--reimport", is_flag=True,
+              help="Import files even if a log with the same filename exists.")
+def import_dir(directory, workers, commit_every, reimport):
+    """Import every ADIF file in DIRECTORY (default: instance/uploads)."""
+    upload_dir = os.path.join(app.instance_path, "uploads")
+    directory = directory or upload_dir
+    from_uploads = os.path.realpath(directory) == os.path.realpath(upload_dir)
+
+    imported = set() if reimport else {
+        filename for (filename,) in db.session.query(Log.filename)
+    }
+    paths = [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
+        and name not in imported
+        and os.path.isfile(os.path.join(directory, name))
+    ]
+    if not paths:
+        click.echo("No new ADIF files to import.")
+        return
+
+    click.echo(f"Importing {len(paths)} files with {workers} parser processes...")
+
+    start = time.perf_counter()
+    park_ids = load_park_ids()
+    hashes = {sha256 for (sha256,) in db.session.query(Log.sha256) if sha256}
+    files = qsos = parsed_qsos = skipped = duplicates = pending = 0
+    touched = set()
+
+    def commit():
+        # Standings are refreshed with each commit so they never lag the QSOs
+        for operator in touched:
+            recompute_operator(operator)
+        touched.clear()
+        db.session.commit()
+
+    # Workers only parse; this process is the single writer. map() keeps
+    # results in file order so ids match a one-by-one import.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for filename, sha256, first, parsed in pool.map(_parse_for_import, paths):
+            if first is None:
+                click.echo(f"  skipped {filename}: no ADIF records found")
+                skipped += 1
+                continue
+            if sha256 in hashes:
+                click.echo(f"  skipped {filename}: same content already imported")
+                duplicates += 1
+                continue
+            hashes.add(sha256)
+
+            log = create_log(first, filename, sha256)
+            if from_uploads:
+                mark_upload_imported(filename, log)
+            count = bulk_insert_qsos(log, parsed, park_ids)
+            touched.add(operator_name(log))
+            files += 1
+            qsos += count
+            parsed_qsos += len(parsed)
+            pending += count
+
+            if pending >= commit_every:
+                commit()
+                pending = 0
+
+    commit()
+    elapsed = time.perf_counter() - start
+
+    click.echo(
+        f"Imported {qsos} QSOs from {files} files in {elapsed:.2f}s "
+        f"({files / elapsed:.1f} files/s, {qsos / elapsed:.0f} QSOs/s)"
+    )
+    if skipped:
+        click.echo(f"Skipped {skipped} empty files.")
+    if duplicates:
+        click.echo(f"Skipped {duplicates} duplicate files.")
+    if parsed_qsos > qsos:
+        click.echo(f"Skipped {parsed_qsos - qsos} duplicate QSOs already in the database.")
+
+
+@parkmas_cli.command("migrations")
+def migrations():
+    """List schema migrations and which ones this database has applied."""
+    from app.migrations import MIGRATIONS, get_version
+
+    current = get_version(db.session.connection())
+    for version, description, _ in MIGRATIONS:
+        state = "applied" if version <= current else "pending"
+        click.echo(f"  {version:>3}  {state:<8} {description}")
+    click.echo(f"Schema version {current}.")
+
+
+@parkmas_cli.command("index-uploads")
+def index_uploads():
+    """Sync the uploads table with the files in instance/uploads."""
+    from app.uploads import sync_upload_index
+
+    added, removed = sync_upload_index()
+    db.session.commit()
+    click.echo(f"Indexed {added} new files, removed {removed} missing files.")
+
+
+@parkmas_cli.command("rescore")
+@click.option("--verify", is_flag=True,
+              help="Only check the stored standings against a full recomputation.")
+@click.option("--engine", type=click.Choice(SCORING_ENGINES),
+              help="Scoring engine used for the recomputation (default: SCORING_ENGINE).")
+@click.option("--workers", "-w", type=int,
+              help="Processes used by the python engine (default: RESCORE_WORKERS).")
+def rescore(verify, engine, workers):
+    """Rebuild (or with --verify, check) the materialized standings."""
+    start = time.perf_counter()
+    engine = scoring_engine(engine)
+    workers = workers or app.config["RESCORE_WORKERS"]
+
+    if verify:
+        problems = verify_standings(engine)
+        for problem in problems:
+            click.echo(f"  MISMATCH {problem}")
+        click.echo(f"Checked standings in {time.perf_counter() - start:.2f}s: "
+                   f"{len(problems)} mismatches.")
+        if problems:
+            raise SystemExit(1)
+        return
+
+    rescore_all(engine, parallel=workers)
+    db.session.commit()
+    how = f"{engine} engine, {workers} workers" if engine == "python" else f"{engine} engine"
+    click.echo(f"Rescored all operators ({how}) in {time.perf_counter() - start:.2f}s.")
+
+
+@parkmas_cli.command("check-engine")
+@click.argument("engine", type=click.Choice(SCORING_ENGINES[1:]))
+def check_engine(engine):
+    """Check ENGINE against score_qsos_for_operator on the current data."""
+    start = time.perf_counter()
+    expected = score_all("python")
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = score_all(engine)
+    engine_time = time.perf_counter() - start
+
+    problems = compare_results(expected, actual)
+    for problem in problems[:50]:
+        click.echo(f"  MISMATCH {problem}")
+    click.echo(f"{len(expected)} operators: python {python_time:.3f}s, "
+               f"{engine} {engine_time:.3f}s, {len(problems)} mismatches.")
+    if problems:
+        raise SystemExit(1)
+
+
+@parkmas_cli.command("archive-season")
+@click.argument("year", type=click.IntRange(1900, 9999))
+def archive_season_command(year):
+    """Archive the current season as YEAR and empty the live tables."""
+    from app.seasons import ArchiveError, archive_season
+
+    try:
+        path, moved = archive_season(year)
+    except ArchiveError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Archived season {year} to {path} and moved {moved} uploads.")
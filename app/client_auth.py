@@ -3,10 +3,15 @@ Client Application Authentication Integration for Parkmas
 Connects to K0IRO centralized authentication system
 """
 
+import hashlib
 import jwt
 import requests
 import os
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
+from requests.adapters import HTTPAdapter
 from flask import session, redirect, request, url_for
 from datetime import datetime
 from dotenv import load_dotenv
@@ -24,6 +29,135 @@ APP_SECRET = os.getenv('APP_SECRET', 'CHANGE_ME_parkmas_secret_key_2024')
 CENTRAL_AUTH_URL = os.getenv('CENTRAL_AUTH_URL', 'https://members.k0iro.com')
 THIS_APP_URL = os.getenv('THIS_APP_URL', 'https://parkmas.k0iro.com')
 
+# Check callback tokens with the central service (1) instead of only
+# verifying the signature locally (0)
+VALIDATE_REMOTE = os.getenv('SSO_VALIDATE_REMOTE', '0') == '1'
+
+# Seconds to wait for the central service; slower answers count as
+# failures for the circuit breaker
+REMOTE_TIMEOUT = float(os.getenv('SSO_TIMEOUT', 5))
+SLOW_SECONDS = float(os.getenv('SSO_SLOW_SECONDS', 1))
+
+# Validated payloads are reused for up to CACHE_TTL seconds (never past
+# the token's exp), for at most CACHE_SIZE tokens
+CACHE_TTL = float(os.getenv('SSO_CACHE_TTL', 300))
+CACHE_SIZE = int(os.getenv('SSO_CACHE_SIZE', 1024))
+
+# After BREAKER_FAILURES failed or slow calls in a row, skip the central
+# service (validate locally) for BREAKER_RESET seconds, then try once
+BREAKER_FAILURES = int(os.getenv('SSO_BREAKER_FAILURES', 3))
+BREAKER_RESET = float(os.getenv('SSO_BREAKER_RESET', 30))
+
+
+# =====================================================
+# REMOTE VALIDATION PLUMBING
+# =====================================================
+
+class TokenCache:
+    """Thread-safe LRU of validated payloads with a per-entry deadline."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key, payload, exp=None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class CircuitBreaker:
+    """
+    Closed: every call goes to the central service. Open (after
+    `failures` failed or slow calls in a row): none do, until
+    `reset_after` seconds pass; then one trial call decides whether it
+    closes again.
+    """
+
+    def __init__(self, failures, reset_after):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._trial and time.monotonic() - self._opened_at >= self.reset_after:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._trial or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def reset(self):
+        self.record_success()
+
+
+# One pooled keep-alive session for every worker thread
+_http = requests.Session()
+_http.mount('http://', HTTPAdapter(pool_maxsize=16))
+_http.mount('https://', HTTPAdapter(pool_maxsize=16))
+
+token_cache = TokenCache(CACHE_SIZE, CACHE_TTL)
+breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET)
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _token_exp(token, payload):
+    """exp from the validated payload, else from the token's own claims."""
+    exp = payload.get('exp')
+    if exp is None:
+        try:
+            exp = jwt.decode(token, options={'verify_signature': False}).get('exp')
+        except jwt.InvalidTokenError:
+            return None
+    return float(exp) if exp is not None else None
+
 
 # =====================================================
 # AUTHENTICATION FUNCTIONS
@@ -51,27 +185,58 @@ def validate_token_local(token):
 
 
 def validate_token_remote(token):
-    """Validate token by calling central auth API"""
+    """
+    Validate token by calling central auth API. Valid payloads are
+    cached by token hash; while the central service is failing or slow
+    the circuit breaker sends validations to validate_token_local.
+    """
+    key = _token_key(token)
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+
+    if not breaker.allow():
+        return validate_token_local(token)
+
+    start = time.monotonic()
     try:
-        response = requests.post(
+        response = _http.post(
             f"{CENTRAL_AUTH_URL}/sso/validate",
             json={
                 'token': token,
                 'app_code': APP_CODE
             },
-            timeout=5
+            timeout=REMOTE_TIMEOUT
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('valid'):
-                return data
-        
-        return None
-        
     except requests.RequestException:
+        breaker.record_failure()
         return validate_token_local(token)
 
+    if response.status_code >= 500:
+        breaker.record_failure()
+        return validate_token_local(token)
+
+    data = {}
+    if response.status_code == 200:
+        try:
+            data = response.json()
+        except ValueError:
+            # A 200 that isn't JSON (e.g. a proxy's error page) is treated
+            # like a 5xx
+            breaker.record_failure()
+            return validate_token_local(token)
+
+    if time.monotonic() - start > SLOW_SECONDS:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+    if data.get('valid'):
+        token_cache.put(key, data, _token_exp(token, data))
+        return data
+
+    return None
+
 
 def init_session_from_token(token, validate_remote=False):
     """Initialize Flask session from a valid JWT token"""
@@ -172,7 +337,7 @@ def setup_auth_routes(app):
         if not token:
             return "No authentication token received", 400
         
-        if init_session_from_token(token):
+        if init_session_from_token(token, validate_remote=VALIDATE_REMOTE):
             next_page = session.pop('next_page', None)
             return redirect(next_page or url_for('main.index'))
         else:
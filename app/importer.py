@@ -1,42 +1,214 @@
+import hashlib
+from itertools import chain, islice
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app import db
-from app.models import Log, QSO
-import adif_io
+from app.adif import read_adif
+from app.models import Log, Operator, QSO, Park, QsoPark, Upload
+from app.standings import operator_name, recompute_operator
+from app.trace import import_log
 
+# Rows per executemany batch. Keeps each statement well under SQLite's
+# bound-parameter limit while still amortizing the round trips.
+BATCH_SIZE = 500
 
-def import_adif_file(filepath, filename):
+# Bytes hashed per read when fingerprinting an upload
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DuplicateLogError(ValueError):
+    """Raised when a file with the same content has already been imported."""
+
+
+def file_sha256(filepath):
+    """Return the hex sha256 of a file, read in fixed-size chunks."""
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_imported_log(sha256):
+    """Return the Log already imported from content with this hash, if any."""
+    return Log.query.filter_by(sha256=sha256).first()
+
+
+def mark_upload_imported(filename, log):
+    """Flag the indexed upload with this filename as imported into log."""
+    upload = Upload.query.filter_by(filename=filename).first()
+    if upload:
+        upload.status = "imported"
+        upload.log_id = log.id
+
+
+def load_park_ids():
+    """Return {park_ref: park_id} for every park in the database."""
+    return dict(db.session.execute(select(Park.park_ref, Park.id)).all())
+
+
+def ensure_parks(park_refs, park_ids):
     """
-    Import an ADIF file into the database.
+    Insert any park refs missing from park_ids and add their new ids to it.
+
+    New parks are inserted in the order they are first seen, matching the
+    ids the per-record import used to assign.
     """
+    missing = list(dict.fromkeys(
+        ref for ref in park_refs if ref and ref not in park_ids
+    ))
+    if not missing:
+        return park_ids
 
-    # Read ADIF file
-    records, header = adif_io.read_from_file(filepath)
+    for i in range(0, len(missing), BATCH_SIZE):
+        batch = missing[i:i + BATCH_SIZE]
+        db.session.execute(insert(Park), [{"park_ref": ref} for ref in batch])
+        park_ids.update(db.session.execute(
+            select(Park.park_ref, Park.id).where(Park.park_ref.in_(batch))
+        ).all())
 
-    if not records:
-        raise ValueError("No ADIF records found")
+    return park_ids
+
+
+def bulk_insert_qsos(log, parsed, park_ids):
+    """
+    Insert parsed (fields, park_ref) pairs for one log in executemany batches.
 
-    # adif_io returns records as list of dicts already - just lowercase the keys
-    first = {k.lower(): v for k, v in records[0].items()}
+    QSO ids are assigned here rather than by flushing each row, so the
+    QsoPark links can be built without a round trip per QSO. This must run
+    inside the write transaction (after the Log row is flushed) so no other
+    writer can claim the same ids.
 
+    QSOs whose natural key already exists (the same contact from any log)
+    are skipped with INSERT ... ON CONFLICT DO NOTHING. Returns the number
+    of QSOs actually inserted.
+    """
+    ensure_parks((park_ref for _, park_ref in parsed), park_ids)
+
+    next_id = (db.session.scalar(select(func.max(QSO.id))) or 0) + 1
+
+    # Keyed by the resolved operator, so K0ABC/P and K0ABC logs of the
+    # same contact collide
+    operator = operator_name(log)
+    qso_rows = []
+    park_by_qso = {}
+    for fields, park_ref in parsed:
+        natural_key = QSO.make_natural_key(
+            operator, fields["call"], fields["band"], fields["mode"], fields["datetime_on"]
+        )
+        qso_rows.append(dict(fields, id=next_id, log_id=log.id, natural_key=natural_key))
+        if park_ref:
+            park_by_qso[next_id] = park_ids[park_ref]
+        next_id += 1
+
+    stmt = (
+        sqlite_insert(QSO.__table__)
+        .on_conflict_do_nothing(index_elements=["natural_key"])
+        .returning(QSO.__table__.c.id)
+    )
+    inserted_ids = []
+    for i in range(0, len(qso_rows), BATCH_SIZE):
+        inserted_ids.extend(db.session.execute(stmt, qso_rows[i:i + BATCH_SIZE]).scalars())
+
+    link_rows = [
+        {"qso_id": qso_id, "park_id": park_by_qso[qso_id]}
+        for qso_id in sorted(inserted_ids)
+        if qso_id in park_by_qso
+    ]
+    for i in range(0, len(link_rows), BATCH_SIZE):
+        db.session.execute(insert(QsoPark), link_rows[i:i + BATCH_SIZE])
+
+    return len(inserted_ids)
+
+
+def parsed_batches(records, size=BATCH_SIZE):
+    """Yield lists of QSO.fields_from_adif results, size records at a time."""
+    records = iter(records)
+    while True:
+        batch = [QSO.fields_from_adif(record) for record in islice(records, size)]
+        if not batch:
+            return
+        yield batch
+
+
+def create_log(first, filename, sha256=None):
+    """Create and flush the Log row for a file, identified from its first record."""
     operator = first.get("operator") or first.get("station_callsign")
     station_callsign = first.get("station_callsign") or operator
 
     if not operator:
         operator = filename.split(".")[0].upper()
 
-    # Create Log row
     log = Log(
+        operator_id=Operator.resolve(operator).id,
         operator=operator.upper(),
         station_callsign=station_callsign.upper() if station_callsign else None,
         filename=filename,
+        sha256=sha256,
     )
     db.session.add(log)
     db.session.flush()
+    return log
+
+
+def parse_adif_file(filepath):
+    """
+    Parse a whole ADIF file without touching the database.
+
+    Returns (sha256, first_record, parsed) where parsed is a list of
+    QSO.fields_from_adif results; first_record is None for an empty
+    file. Used by the parallel directory import, which runs it in
+    worker processes.
+    """
+    sha256 = file_sha256(filepath)
+    records = read_adif(filepath)
+    first = next(records, None)
+    if first is None:
+        return sha256, None, []
+
+    parsed = [QSO.fields_from_adif(record) for record in chain([first], records)]
+    return sha256, first, parsed
+
+
+def import_adif_file(filepath, filename, progress=None, sha256=None):
+    """
+    Import an ADIF file into the database.
+
+    If given, progress(records_parsed, records_inserted) is called after
+    each batch is inserted. Raises DuplicateLogError if a file with the
+    same content (sha256) was already imported, so re-running an import
+    is a no-op. QSOs already stored from another log are skipped; returns
+    the number of QSOs inserted.
+    """
+    sha256 = sha256 or file_sha256(filepath)
+    existing = find_imported_log(sha256)
+    if existing:
+        raise DuplicateLogError(f"Already imported as {existing.filename}")
+
+    # Stream ADIF records; only one batch is held in memory at a time
+    records = read_adif(filepath)
+    first = next(records, None)
+
+    if first is None:
+        raise ValueError("No ADIF records found")
+
+    log = create_log(first, filename, sha256)
+    mark_upload_imported(filename, log)
 
-    # Process each QSO record
-    for qso_record in records:
-        QSO.from_adif(qso_record, log.id)
+    park_ids = load_park_ids()
+    parsed_count = 0
+    count = 0
+    for parsed in parsed_batches(chain([first], records)):
+        parsed_count += len(parsed)
+        count += bulk_insert_qsos(log, parsed, park_ids)
+        if progress:
+            progress(parsed_count, count)
 
+    operator = log.operator
+    recompute_operator(operator_name(log))
     db.session.commit()
 
-    print("Imported", len(records), "QSOs for operator:", operator)
-    return len(records)
\ No newline at end of file
+    import_log.info("Imported %d QSOs for operator: %s", count, operator)
+    if parsed_count > count:
+        import_log.info("Skipped %d duplicate QSOs already in the database", parsed_count - count)
+    return count
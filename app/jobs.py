@@ -0,0 +1,244 @@
+"""
+Background job queue.
+
+Accepting an upload only inserts a row into the import_jobs table (kept
+in instance/jobs.db). Every app process runs one worker thread that
+claims queued jobs and runs import_adif_file outside of any request, so
+large logs never hit gunicorn's request timeout. Progress is written to
+the jobs database as each batch is inserted, so any worker can answer
+/admin/jobs/<id>.
+
+The same queue runs full rescores (kind "rescore"), which score across
+RESCORE_WORKERS processes with rescore_all(parallel=...).
+"""
+
+import os
+import threading
+import time
+import traceback
+
+from sqlalchemy import select, update
+
+from app import db
+from app.importer import import_adif_file
+from app.models import ImportJob
+from app.standings import rescore_all
+
+# Seconds an idle worker sleeps before checking for jobs queued by
+# another process
+POLL_INTERVAL = 2.0
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# filename recorded for rescore jobs, which have no upload
+RESCORE_FILENAME = "(all operators)"
+
+# Set when this process enqueues a job so its worker wakes immediately
+_wake = threading.Event()
+_worker = None
+
+
+def _jobs_engine():
+    return db.engines["jobs"]
+
+
+def _update_job(job_id, **values):
+    """Write job fields in their own short transaction on the jobs database."""
+    with _jobs_engine().begin() as conn:
+        return conn.execute(
+            update(ImportJob.__table__)
+            .where(ImportJob.__table__.c.id == job_id)
+            .values(**values)
+        ).rowcount
+
+
+def enqueue_import(filename):
+    """
+    Queue an import of instance/uploads/<filename> and return its job.
+    Returns the existing job if that file is already queued or running.
+    """
+    return _enqueue("import", filename)
+
+
+def enqueue_rescore():
+    """Queue a full rescore, or return the one already queued or running."""
+    return _enqueue("rescore", RESCORE_FILENAME)
+
+
+def _enqueue(kind, filename):
+    job = (
+        ImportJob.query
+        .filter(
+            ImportJob.kind == kind,
+            ImportJob.filename == filename,
+            ImportJob.status.in_(ACTIVE_STATUSES),
+        )
+        .first()
+    )
+    if job:
+        return job
+
+    job = ImportJob(kind=kind, filename=filename, status="queued", created_at=time.time())
+    db.session.add(job)
+    db.session.commit()
+
+    _wake.set()
+    return job
+
+
+def cancel_active_jobs(reason):
+    """Mark every queued or running job failed with reason; returns how many."""
+    table = ImportJob.__table__
+    with _jobs_engine().begin() as conn:
+        return conn.execute(
+            update(table)
+            .where(table.c.status.in_(ACTIVE_STATUSES))
+            .values(status="failed", error=reason, finished_at=time.time())
+        ).rowcount
+
+
+def active_jobs_by_filename():
+    """Return {filename: job} for every queued or running import."""
+    jobs = ImportJob.query.filter(
+        ImportJob.kind == "import", ImportJob.status.in_(ACTIVE_STATUSES)
+    ).all()
+    return {job.filename: job for job in jobs}
+
+
+def failed_jobs_by_filename():
+    """Return {filename: job} with the latest failed import of each file."""
+    jobs = ImportJob.query.filter_by(kind="import", status="failed").order_by(ImportJob.id).all()
+    return {job.filename: job for job in jobs}
+
+
+def active_rescore_job():
+    """The queued or running rescore job, if any."""
+    return ImportJob.query.filter(
+        ImportJob.kind == "rescore", ImportJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _requeue_orphans():
+    """
+    Put jobs back in the queue whose worker process died mid-import
+    (e.g. a gunicorn worker restart). Their import transaction was
+    never committed, so running them again is safe.
+    """
+    table = ImportJob.__table__
+    with _jobs_engine().begin() as conn:
+        running = conn.execute(
+            select(table.c.id, table.c.worker_pid).where(table.c.status == "running")
+        ).all()
+        for job_id, pid in running:
+            if pid and pid != os.getpid() and not _pid_alive(pid):
+                conn.execute(
+                    update(table)
+                    .where(table.c.id == job_id, table.c.status == "running")
+                    .values(status="queued", worker_pid=None, started_at=None)
+                )
+
+
+def claim_next_job():
+    """Atomically mark the oldest queued job as running in this process."""
+    table = ImportJob.__table__
+    while True:
+        with _jobs_engine().begin() as conn:
+            job_id = conn.execute(
+                select(table.c.id)
+                .where(table.c.status == "queued")
+                .order_by(table.c.id)
+                .limit(1)
+            ).scalar()
+            if job_id is None:
+                return None
+
+            claimed = conn.execute(
+                update(table)
+                .where(table.c.id == job_id, table.c.status == "queued")
+                .values(status="running", worker_pid=os.getpid(), started_at=time.time())
+            ).rowcount
+
+        if claimed:
+            return db.session.get(ImportJob, job_id)
+        # Another worker won the race; try the next job
+
+
+def run_job(app, job):
+    """Run one claimed job and record its outcome."""
+    if job.kind == "rescore":
+        return run_rescore_job(app, job)
+
+    job_id = job.id
+    filename = job.filename
+    full_path = os.path.join(app.instance_path, "uploads", filename)
+
+    def progress(parsed, inserted):
+        _update_job(job_id, records_parsed=parsed, records_inserted=inserted)
+
+    try:
+        if not os.path.isfile(full_path):
+            raise FileNotFoundError(f"Upload {filename} no longer exists")
+
+        inserted = import_adif_file(full_path, filename, progress=progress)
+        _update_job(job_id, status="done", records_inserted=inserted, finished_at=time.time())
+
+    except Exception as e:
+        db.session.rollback()
+        traceback.print_exc()
+        _update_job(job_id, status="failed", error=str(e), finished_at=time.time())
+
+
+def run_rescore_job(app, job):
+    """Rebuild the materialized standings across RESCORE_WORKERS processes."""
+    job_id = job.id
+    try:
+        rescore_all(parallel=app.config["RESCORE_WORKERS"])
+        db.session.commit()
+        _update_job(job_id, status="done", finished_at=time.time())
+
+    except Exception as e:
+        db.session.rollback()
+        traceback.print_exc()
+        _update_job(job_id, status="failed", error=str(e), finished_at=time.time())
+
+
+def _worker_loop(app):
+    with app.app_context():
+        while True:
+            try:
+                _requeue_orphans()
+                job = claim_next_job()
+                if job is None:
+                    _wake.wait(POLL_INTERVAL)
+                    _wake.clear()
+                    continue
+
+                run_job(app, job)
+            except Exception:
+                traceback.print_exc()
+                time.sleep(POLL_INTERVAL)
+            finally:
+                db.session.remove()
+
+
+def start_worker(app):
+    """Start this process's import worker thread (once)."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return _worker
+
+    _worker = threading.Thread(
+        target=_worker_loop, args=(app,), name="parkmas-import-worker", daemon=True
+    )
+    _worker.start()
+    return _worker
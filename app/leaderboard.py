@@ -0,0 +1,164 @@
+"""
+Live leaderboard updates.
+
+/leaders/stream is a Server-Sent Events feed. Each process runs a single
+StandingsHub thread that polls the data version in the main database (a
+one-row read any gunicorn worker can do, so no broker or cross-process
+signalling is needed) and fans the changed rows out to the streams open
+in that process. However many viewers there are, a process makes one
+query a second, and only when an import or multiplier change has bumped
+the version does it read the standings.
+
+Every open stream still holds a worker thread, so a process serves at
+most LEADERS_STREAM_LIMIT of them; the rest get a 503 and their page
+simply stays as rendered.
+"""
+
+import json
+import queue
+import threading
+import time
+
+from app.cache import current_version
+from app.standings import load_standings
+
+# Seconds between version checks on each open stream
+POLL_INTERVAL = 1.0
+
+# Seconds of silence before a keep-alive comment (keeps proxies from
+# closing the connection)
+KEEPALIVE_INTERVAL = 15.0
+
+# Streams end before gunicorn's --timeout; browsers reconnect on their
+# own (after RETRY_MS) and resume from the last event id
+STREAM_SECONDS = 55.0
+RETRY_MS = 2000
+
+
+def snapshot():
+    """{operator: row} for the current standings, each row with its rank."""
+    return {
+        row["operator"]: {
+            "rank": rank,
+            "operator": row["operator"],
+            "total_score": row["total_score"],
+            "parks": row["parks"],
+        }
+        for rank, row in enumerate(load_standings(), start=1)
+    }
+
+
+def standings_delta(old, new):
+    """Rows that are new or changed between two snapshots, and operators that left."""
+    changed = [row for operator, row in new.items() if old.get(operator) != row]
+    removed = sorted(old.keys() - new.keys())
+    return changed, removed
+
+
+def sse(data, event=None, event_id=None):
+    """Format one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class StandingsHub:
+    """One poller per process fanning standings deltas out to subscriber queues."""
+
+    def __init__(self, app, limit):
+        self.app = app
+        self.limit = limit
+        self.version = None
+        self.rows = {}
+        self._subscribers = set()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        # A fresh app context per poll, so no read transaction is held open
+        # between polls
+        with self.app.app_context():
+            return current_version(), snapshot()
+
+    def subscribe(self):
+        """
+        (queue, version, rows) for a new stream: the standings as of
+        `version`, then deltas on the queue. None if the process is at
+        its stream limit.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.limit:
+                return None
+            if self._thread is None:
+                # Nobody was listening, so the last snapshot may be stale
+                self.version, self.rows = self._read()
+                self._thread = threading.Thread(target=self._run, name="standings-hub", daemon=True)
+                self._thread.start()
+            subscriber = queue.Queue()
+            self._subscribers.add(subscriber)
+            return subscriber, self.version, self.rows
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _run(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                with self.app.app_context():
+                    latest = current_version()
+                if latest == self.version:
+                    continue
+                version, rows = self._read()
+            except Exception:
+                self.app.logger.exception("Leaderboard stream poll failed")
+                continue
+
+            changed, removed = standings_delta(self.rows, rows)
+            event = {"version": version, "rows": changed, "removed": removed}
+            with self._lock:
+                self.version, self.rows = version, rows
+                for subscriber in self._subscribers:
+                    subscriber.put(event)
+
+
+def standings_hub(app):
+    """The process's StandingsHub for app, created on first use."""
+    hub = app.extensions.get("standings_hub")
+    if hub is None:
+        hub = app.extensions.setdefault(
+            "standings_hub", StandingsHub(app, app.config["LEADERS_STREAM_LIMIT"])
+        )
+    return hub
+
+
+def standings_events(subscription, since=None):
+    """
+    Generate the SSE stream for a StandingsHub subscription whose client
+    has the standings as of data version `since`. A client that is
+    behind (or did not say) first gets every row in a "reset" event;
+    after that only deltas are sent.
+    """
+    subscriber, version, rows = subscription
+    yield f"retry: {RETRY_MS}\n\n"
+    if since != version:
+        yield sse({"version": version, "rows": list(rows.values()), "removed": []},
+                  event="reset", event_id=version)
+
+    deadline = time.monotonic() + STREAM_SECONDS
+    while (remaining := deadline - time.monotonic()) > 0:
+        try:
+            event = subscriber.get(timeout=min(KEEPALIVE_INTERVAL, remaining))
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        yield sse(event, event="delta", event_id=event["version"])
@@ -0,0 +1,395 @@
+"""
+Versioned schema migrations for the Parkmas SQLite database.
+
+db.create_all() creates missing tables but never alters existing ones,
+so columns and indexes added after a database was created are applied
+here. Each migration runs once, in order, and the schema version is
+tracked with SQLite's PRAGMA user_version.
+
+Fresh databases already get the latest schema from create_all(), so
+every migration must be idempotent (skip columns/indexes that exist).
+
+Every gunicorn worker runs create_app, so migrate() holds an exclusive
+lock on instance/migrate.lock while it creates tables and migrates:
+the first worker does the work and the others find it done.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single development server, no lock needed
+    fcntl = None
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from datetime import datetime
+
+from app import db
+from app.adif import read_adif
+from app.importer import file_sha256
+from app.models import QSO, Operator
+from app.standings import ensure_standings
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration function(conn, app) for a schema version."""
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+# -----------------------------
+# HELPERS
+# -----------------------------
+def column_names(conn, table):
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def add_column(conn, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if column in column_names(conn, table):
+        return
+    try:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    except OperationalError as e:
+        # Another worker may have added it between the check and here
+        if "duplicate column" not in str(e):
+            raise
+
+
+def get_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def set_version(conn, version):
+    conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+
+@contextmanager
+def migration_lock(app):
+    """Hold an exclusive lock on instance/migrate.lock (blocks until free)."""
+    with open(os.path.join(app.instance_path, "migrate.lock"), "w") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def migrate(app):
+    """
+    Create missing tables and apply pending migrations, one process at
+    a time. Run in an app context.
+    """
+    with migration_lock(app):
+        db.create_all()
+        upgrade(app)
+
+        # Databases from before materialized standings get them built once
+        ensure_standings()
+
+
+def upgrade(app):
+    """
+    Apply every migration newer than the database's user_version (read
+    now, so under migration_lock it reflects other workers' upgrades).
+    Each migration runs and commits in its own transaction on the
+    session's connection, so migrations may also use the ORM.
+    """
+    current = get_version(db.session.connection())
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        print(f"Applying migration {version}: {description}")
+        conn = db.session.connection()
+        fn(conn, app)
+        set_version(conn, version)
+        db.session.commit()
+        current = version
+
+
+# -----------------------------
+# MIGRATIONS
+# -----------------------------
+@migration(1, "logs.sha256 content hash with unique index")
+def _log_sha256(conn, app):
+    add_column(conn, "logs", "sha256", "VARCHAR(64)")
+
+    # Backfill hashes from the uploads still on disk. Only the first log
+    # for each content hash gets it, so the unique index can be built
+    # even if the same file was imported twice before this existed.
+    upload_dir = os.path.join(app.instance_path, "uploads")
+    seen = {
+        row[0] for row in conn.execute(text("SELECT sha256 FROM logs WHERE sha256 IS NOT NULL"))
+    }
+    logs = conn.execute(text("SELECT id, filename FROM logs WHERE sha256 IS NULL ORDER BY id")).all()
+    for log_id, filename in logs:
+        path = os.path.join(upload_dir, filename or "")
+        if not filename or not os.path.isfile(path):
+            continue
+
+        digest = file_sha256(path)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        conn.execute(text("UPDATE logs SET sha256 = :h WHERE id = :id"), {"h": digest, "id": log_id})
+
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_logs_sha256 ON logs (sha256)"))
+
+
+@migration(2, "qsos.natural_key unique index; remove duplicate contacts")
+def _qso_natural_key(conn, app):
+    add_column(conn, "qsos", "natural_key", "VARCHAR(40)")
+
+    rows = conn.execute(text("""
+        SELECT q.id, l.operator, q.call, q.band, q.mode, q.datetime_on
+        FROM qsos q JOIN logs l ON l.id = q.log_id
+        WHERE q.natural_key IS NULL AND q.datetime_on IS NOT NULL
+        ORDER BY q.id
+    """)).all()
+
+    seen = {
+        row[0] for row in conn.execute(text("SELECT natural_key FROM qsos WHERE natural_key IS NOT NULL"))
+    }
+    updates = []
+    duplicate_ids = []
+    for qso_id, operator, call, band, mode, datetime_on in rows:
+        if isinstance(datetime_on, str):
+            datetime_on = datetime.fromisoformat(datetime_on)
+        key = QSO.make_natural_key(operator, call, band, mode, datetime_on)
+        if key in seen:
+            # Same contact stored by an earlier log; keep the first copy
+            duplicate_ids.append({"id": qso_id})
+        else:
+            seen.add(key)
+            updates.append({"k": key, "id": qso_id})
+
+    if updates:
+        conn.execute(text("UPDATE qsos SET natural_key = :k WHERE id = :id"), updates)
+    if duplicate_ids:
+        conn.execute(text("DELETE FROM qso_parks WHERE qso_id = :id"), duplicate_ids)
+        conn.execute(text("DELETE FROM qsos WHERE id = :id"), duplicate_ids)
+        print(f"  removed {len(duplicate_ids)} duplicate QSOs")
+
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_qsos_natural_key ON qsos (natural_key)"))
+
+
+@migration(3, "uploads index table populated from instance/uploads")
+def _upload_index(conn, app):
+    from app.uploads import sync_upload_index
+
+    added, removed = sync_upload_index()
+    print(f"  indexed {added} uploaded files")
+
+
+@migration(4, "qsos.park_ref and qsos.tx_pwr denormalized scoring columns")
+def _qso_scoring_columns(conn, app):
+    add_column(conn, "qsos", "park_ref", "VARCHAR(20)")
+    add_column(conn, "qsos", "tx_pwr", "FLOAT")
+
+    # Activator park comes straight from the existing links
+    conn.execute(text("""
+        UPDATE qsos SET park_ref = (
+            SELECT p.park_ref FROM qso_parks qp JOIN parks p ON p.id = qp.park_id
+            WHERE qp.qso_id = qsos.id ORDER BY qp.id LIMIT 1
+        )
+        WHERE park_ref IS NULL
+    """))
+
+    # TX power was never stored, so recover it from the uploads still on
+    # disk, matching records to rows by natural key
+    upload_dir = os.path.join(app.instance_path, "uploads")
+    logs = conn.execute(text("SELECT id, operator, filename FROM logs")).all()
+    for log_id, operator, filename in logs:
+        path = os.path.join(upload_dir, filename or "")
+        if not filename or not os.path.isfile(path):
+            continue
+
+        updates = []
+        for record in read_adif(path):
+            fields, _ = QSO.fields_from_adif(record)
+            key = QSO.make_natural_key(
+                operator, fields["call"], fields["band"], fields["mode"], fields["datetime_on"]
+            )
+            if key and fields["tx_pwr"] is not None:
+                updates.append({"k": key, "p": fields["tx_pwr"], "log_id": log_id})
+        if updates:
+            conn.execute(text(
+                "UPDATE qsos SET tx_pwr = :p WHERE natural_key = :k AND log_id = :log_id AND tx_pwr IS NULL"
+            ), updates)
+
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_qsos_park_ref ON qsos (park_ref)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_qsos_tx_pwr ON qsos (tx_pwr)"))
+
+
+@migration(5, "daily_multipliers (operator, date) index")
+def _daily_multiplier_index(conn, app):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_daily_multipliers_operator_date "
+        "ON daily_multipliers (operator, date)"
+    ))
+
+
+@migration(6, "import_jobs.kind so the job queue can also run full rescores")
+def _job_kind(conn, app):
+    # import_jobs lives in the jobs database, not the one user_version tracks
+    with db.engines["jobs"].begin() as jobs_conn:
+        add_column(jobs_conn, "import_jobs", "kind", "VARCHAR(20) NOT NULL DEFAULT 'import'")
+
+
+@migration(7, "hot-path indexes; one daily multiplier per (operator, date)")
+def _hot_path_indexes(conn, app):
+    for table, column in [
+        ("qsos", "log_id"),
+        ("qsos", "datetime_on"),
+        ("qso_parks", "qso_id"),
+        ("qso_parks", "park_id"),
+        ("logs", "operator"),
+    ]:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+    # Scoring already lets the newest row win when a day has several
+    # multipliers, so keep that one
+    removed = conn.execute(text("""
+        DELETE FROM daily_multipliers WHERE id NOT IN (
+            SELECT max(id) FROM daily_multipliers GROUP BY operator, date
+        )
+    """)).rowcount
+    if removed:
+        print(f"  removed {removed} duplicate daily multipliers")
+
+    conn.execute(text("DROP INDEX IF EXISTS ix_daily_multipliers_operator_date"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX ix_daily_multipliers_operator_date "
+        "ON daily_multipliers (operator, date)"
+    ))
+
+
+@migration(8, "operators table; logs.operator_id resolved with portable suffixes merged")
+def _operators(conn, app):
+    # create_all() has made the operators table; only logs needs altering
+    add_column(conn, "logs", "operator_id", "INTEGER REFERENCES operators (id)")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_logs_operator_id ON logs (operator_id)"))
+
+    # Name each log the way the leaderboard used to, then merge /P, /QRP
+    # and similar variants into one operator
+    logs = conn.execute(text("""
+        SELECT id, upper(coalesce(nullif(operator, ''), nullif(station_callsign, ''), 'LOG-' || id))
+        FROM logs WHERE operator_id IS NULL
+    """)).all()
+    names = {log_id: Operator.base_callsign(name) for log_id, name in logs}
+    if names:
+        conn.execute(
+            text("INSERT OR IGNORE INTO operators (callsign) VALUES (:c)"),
+            [{"c": name} for name in sorted(set(names.values()))],
+        )
+        ids = dict(conn.execute(text("SELECT callsign, id FROM operators")).all())
+        conn.execute(
+            text("UPDATE logs SET operator_id = :o WHERE id = :id"),
+            [{"o": ids[name], "id": log_id} for log_id, name in names.items()],
+        )
+
+    # Multipliers follow their operator unless the merged name already
+    # has one for that day
+    multipliers = conn.execute(text("SELECT id, operator FROM daily_multipliers")).all()
+    renamed = [
+        {"id": bonus_id, "c": Operator.base_callsign(operator)}
+        for bonus_id, operator in multipliers
+        if Operator.base_callsign(operator) != operator
+    ]
+    if renamed:
+        conn.execute(
+            text("UPDATE OR IGNORE daily_multipliers SET operator = :c WHERE id = :id"), renamed
+        )
+
+    # Standings under the old names are rebuilt by ensure_standings()
+    merged = sum(1 for log_id, name in logs if names[log_id] != name)
+    if merged:
+        conn.execute(text("DELETE FROM day_park_scores"))
+        conn.execute(text("DELETE FROM operator_scores"))
+        print(f"  merged {merged} logs into their base callsign; standings will be rebuilt")
+    print(f"  linked {len(logs)} logs to {len(set(names.values()))} operators")
+
+
+@migration(9, "qsos.natural_key rebuilt from the resolved operator; merged duplicates removed")
+def _operator_natural_keys(conn, app):
+    rows = conn.execute(text("""
+        SELECT q.id, q.natural_key, o.callsign, q.call, q.band, q.mode, q.datetime_on
+        FROM qsos q
+        JOIN logs l ON l.id = q.log_id
+        JOIN operators o ON o.id = l.operator_id
+        WHERE q.datetime_on IS NOT NULL
+        ORDER BY q.id
+    """)).all()
+
+    seen = set()
+    updates = []
+    duplicate_ids = []
+    for qso_id, old_key, callsign, call, band, mode, datetime_on in rows:
+        if isinstance(datetime_on, str):
+            datetime_on = datetime.fromisoformat(datetime_on)
+        key = QSO.make_natural_key(callsign, call, band, mode, datetime_on)
+        if key in seen:
+            # The same contact from a K0ABC/P and a K0ABC log; keep the first
+            duplicate_ids.append({"id": qso_id})
+            continue
+        seen.add(key)
+        if key != old_key:
+            updates.append({"k": key, "id": qso_id})
+
+    if duplicate_ids:
+        conn.execute(text("DELETE FROM qso_parks WHERE qso_id = :id"), duplicate_ids)
+        conn.execute(text("DELETE FROM qsos WHERE id = :id"), duplicate_ids)
+        # Counts changed; ensure_standings() rebuilds them at startup
+        conn.execute(text("DELETE FROM day_park_scores"))
+        conn.execute(text("DELETE FROM operator_scores"))
+        print(f"  removed {len(duplicate_ids)} duplicate QSOs from merged operators")
+    if updates:
+        # Clear first so no new key meets another row's old one mid-update
+        conn.execute(text("UPDATE qsos SET natural_key = NULL WHERE id = :id"), updates)
+        conn.execute(text("UPDATE qsos SET natural_key = :k WHERE id = :id"), updates)
+        print(f"  rekeyed {len(updates)} QSOs")
+
+
+@migration(10, "logs.operator_id re-resolved without merging on callsign prefixes")
+def _operator_prefixes(conn, app):
+    # Migration 8 kept the longest part of VE3/K0ABC-style calls, which
+    # merged VP2E/W1AW or KL7/W0A logs under their DX prefix
+    logs = conn.execute(text("""
+        SELECT l.id, o.callsign,
+               upper(coalesce(nullif(l.operator, ''), nullif(l.station_callsign, ''), 'LOG-' || l.id))
+        FROM logs l JOIN operators o ON o.id = l.operator_id
+    """)).all()
+    moved = {
+        log_id: Operator.base_callsign(name)
+        for log_id, current, name in logs
+        if Operator.base_callsign(name) != current
+    }
+    if not moved:
+        return
+
+    conn.execute(
+        text("INSERT OR IGNORE INTO operators (callsign) VALUES (:c)"),
+        [{"c": name} for name in sorted(set(moved.values()))],
+    )
+    ids = dict(conn.execute(text("SELECT callsign, id FROM operators")).all())
+    conn.execute(
+        text("UPDATE logs SET operator_id = :o WHERE id = :id"),
+        [{"o": ids[name], "id": log_id} for log_id, name in moved.items()],
+    )
+    conn.execute(text("DELETE FROM operators WHERE id NOT IN (SELECT operator_id FROM logs)"))
+
+    # Natural keys follow the operator; standings are rebuilt by ensure_standings()
+    _operator_natural_keys(conn, app)
+    conn.execute(text("DELETE FROM day_park_scores"))
+    conn.execute(text("DELETE FROM operator_scores"))
+    print(f"  moved {len(moved)} logs off a merged callsign prefix; standings will be rebuilt")
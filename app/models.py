@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import hashlib
+import time
+
 
 db = SQLAlchemy()
 
@@ -17,13 +20,64 @@ class User(db.Model):
         return f"<User {self.callsign}>"
 
 
+class Operator(db.Model):
+    """
+    A leaderboard entrant. Every Log points at one, resolved once at
+    import, so grouping QSOs by operator is a join on indexed ids.
+    """
+    __tablename__ = "operators"
+
+    # Portable/power suffixes that still mean the same station:
+    # K0ABC/P, K0ABC/QRP and K0ABC all score as K0ABC
+    PORTABLE_SUFFIXES = {"P", "M", "MM", "AM", "A", "QRP", "QRPP"}
+
+    id = db.Column(db.Integer, primary_key=True)
+    callsign = db.Column(db.String(20), unique=True, nullable=False)
+
+    logs = db.relationship("Log", backref="entrant", lazy=True)
+
+    @classmethod
+    def base_callsign(cls, callsign):
+        """
+        The operator a logged callsign belongs to: upper-cased, without
+        trailing portable suffixes or a call-area digit (K0ABC/P,
+        K0ABC/QRP/7). Prefixes are kept, so VE3/K0ABC is an entrant of
+        its own: neither the first nor the longest part is reliably the
+        home call (VP2E/W1AW, KL7/W0A).
+        """
+        parts = callsign.strip().upper().split("/")
+        while len(parts) > 1 and (
+            not parts[-1] or parts[-1] in cls.PORTABLE_SUFFIXES or parts[-1].isdigit()
+        ):
+            parts.pop()
+        return "/".join(parts) or callsign.strip().upper()
+
+    @classmethod
+    def resolve(cls, callsign):
+        """Find or create (and flush) the Operator for a logged callsign."""
+        name = cls.base_callsign(callsign)
+        operator = cls.query.filter_by(callsign=name).first()
+        if operator is None:
+            operator = cls(callsign=name)
+            db.session.add(operator)
+            db.session.flush()
+        return operator
+
+    def __repr__(self):
+        return f"<Operator {self.callsign}>"
+
+
 class Log(db.Model):
     __tablename__ = "logs"
 
     id = db.Column(db.Integer, primary_key=True)
-    operator = db.Column(db.String(20))
+    operator_id = db.Column(db.Integer, db.ForeignKey("operators.id"), index=True)
+    # Callsigns as logged; operator_id is who they score for
+    operator = db.Column(db.String(20), index=True)
     station_callsign = db.Column(db.String(20))
     filename = db.Column(db.String(255))
+    # sha256 of the uploaded file; one Log per distinct file content
+    sha256 = db.Column(db.String(64), unique=True, index=True)
 
     qsos = db.relationship("QSO", backref="log", lazy=True)
 
@@ -32,7 +86,7 @@ class QSO(db.Model):
     __tablename__ = "qsos"
 
     id = db.Column(db.Integer, primary_key=True)
-    log_id = db.Column(db.Integer, db.ForeignKey("logs.id"), nullable=False)
+    log_id = db.Column(db.Integer, db.ForeignKey("logs.id"), nullable=False, index=True)
 
     call = db.Column(db.String(20))
     band = db.Column(db.String(20))
@@ -48,25 +102,50 @@ class QSO(db.Model):
     distance = db.Column(db.Float)
     raw_comment = db.Column(db.String(255))
 
-    datetime_on = db.Column(db.DateTime)
+    datetime_on = db.Column(db.DateTime, index=True)
     datetime_off = db.Column(db.DateTime)
 
+    # Activator park and TX power, stored flat so scoring never has to
+    # walk the QsoPark/Park relationships
+    park_ref = db.Column(db.String(20), index=True)
+    tx_pwr = db.Column(db.Float, index=True)
+
+    # Hash of (operator, call, band, mode, datetime_on) so the same
+    # contact can only be stored once across all logs. NULL for QSOs
+    # without a start time, which never collide.
+    natural_key = db.Column(db.String(40), unique=True, index=True)
+
     parks = db.relationship("QsoPark", backref="qso", lazy=True)
 
+    @staticmethod
+    def make_natural_key(operator, call, band, mode, datetime_on):
+        """Return the natural-key hash for a contact, or None without a start time."""
+        if datetime_on is None:
+            return None
+        parts = [
+            (operator or "").upper(),
+            (call or "").upper(),
+            (band or "").upper(),
+            (mode or "").upper(),
+            datetime_on.strftime("%Y%m%d%H%M"),
+        ]
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
     # ---------------------------------------------------------
     # ADIF IMPORT LOGIC
     # ---------------------------------------------------------
     @classmethod
-    def from_adif(cls, record, log_id):
-        """Create a QSO object from an ADIF record dict."""
+    def fields_from_adif(cls, record):
+        """
+        Parse an ADIF record dict into QSO column values.
+
+        Returns (fields, park_ref) where fields is a dict of QSO columns
+        (without log_id) and park_ref is the normalized activator park
+        reference or None (also stored in fields). Does no database work, so it is safe to call
+        in bulk import loops.
+        """
         r = {k.lower(): v for k, v in record.items()}
 
-        # Print debug info for first QSO
-        if log_id == 1:
-            print(f"\nDEBUG: Sample ADIF record keys: {list(r.keys())[:10]}")
-            print(f"QSO_DATE value: '{r.get('qso_date')}'")
-            print(f"TIME_ON value: '{r.get('time_on')}'")
-
         # -----------------------------
         # DATETIME PARSING (FIXED)
         # -----------------------------
@@ -77,15 +156,13 @@ class QSO(db.Model):
             try:
                 qso_date = r["qso_date"].strip()
                 time_on = r["time_on"].strip()
-                
+
                 # Handle time formats: "HHMM", "HHMMSS", or with spaces
                 time_on = time_on.replace(" ", "")[:4]  # Take first 4 digits only (HHMM)
-                
+
                 # Parse: YYYYMMDD + HHMM
                 dt_on = datetime.strptime(qso_date + time_on, "%Y%m%d%H%M")
-                print(f"Parsed datetime_on: {dt_on}")
-            except Exception as e:
-                print(f"ERROR parsing datetime_on: {e} (date='{r.get('qso_date')}', time='{r.get('time_on')}')")
+            except ValueError:
                 dt_on = None
 
         if "qso_date_off" in r and "time_off" in r:
@@ -93,17 +170,12 @@ class QSO(db.Model):
                 qso_date_off = r["qso_date_off"].strip()
                 time_off = r["time_off"].strip()
                 time_off = time_off.replace(" ", "")[:4]
-                
+
                 dt_off = datetime.strptime(qso_date_off + time_off, "%Y%m%d%H%M")
-            except Exception as e:
-                print(f"ERROR parsing datetime_off: {e}")
+            except ValueError:
                 dt_off = None
 
-        # -----------------------------
-        # CREATE QSO OBJECT
-        # -----------------------------
-        qso = cls(
-            log_id=log_id,
+        fields = dict(
             call=r.get("call"),
             band=r.get("band"),
             mode=r.get("mode"),
@@ -121,9 +193,6 @@ class QSO(db.Model):
             datetime_off=dt_off,
         )
 
-        db.session.add(qso)
-        db.session.flush()  # ensures qso.id exists
-
         # -----------------------------
         # PARK HANDLING - Prioritize MY park (where YOU are activating from)
         # -----------------------------
@@ -138,22 +207,19 @@ class QSO(db.Model):
             or r.get("pota_ref")
         )
 
-        if pota:
-            # Normalize park ref (e.g., K-1234)
-            pota = pota.strip().upper()
+        # Normalize park ref (e.g., K-1234)
+        park_ref = pota.strip().upper() if pota else None
+        fields["park_ref"] = park_ref
 
-            # Find or create Park
-            park = Park.query.filter_by(park_ref=pota).first()
-            if not park:
-                park = Park(park_ref=pota)
-                db.session.add(park)
-                db.session.flush()
-
-            # Link QSO ↔ Park
-            link = QsoPark(qso_id=qso.id, park_id=park.id)
-            db.session.add(link)
+        # TX power in watts; loggers sometimes append a unit ("5W")
+        fields["tx_pwr"] = None
+        if "tx_pwr" in r:
+            try:
+                fields["tx_pwr"] = float(r["tx_pwr"].strip().upper().rstrip("W"))
+            except ValueError:
+                pass
 
-        return qso
+        return fields, park_ref
 
 
 class Park(db.Model):
@@ -169,12 +235,17 @@ class QsoPark(db.Model):
     __tablename__ = "qso_parks"
 
     id = db.Column(db.Integer, primary_key=True)
-    qso_id = db.Column(db.Integer, db.ForeignKey("qsos.id"), nullable=False)
-    park_id = db.Column(db.Integer, db.ForeignKey("parks.id"), nullable=False)
+    qso_id = db.Column(db.Integer, db.ForeignKey("qsos.id"), nullable=False, index=True)
+    park_id = db.Column(db.Integer, db.ForeignKey("parks.id"), nullable=False, index=True)
 
 
 class DailyMultiplier(db.Model):
     __tablename__ = "daily_multipliers"
+    __table_args__ = (
+        # One multiplier per operator and day; scoring looks them up by
+        # (operator, date)
+        db.Index("ix_daily_multipliers_operator_date", "operator", "date", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     operator = db.Column(db.String(20), nullable=False)
@@ -183,4 +254,117 @@ class DailyMultiplier(db.Model):
     reason = db.Column(db.String(255))
     
     def __repr__(self):
-        return f"<DailyMultiplier {self.operator} {self.date} ×{self.multiplier}>"
\ No newline at end of file
+        return f"<DailyMultiplier {self.operator} {self.date} ×{self.multiplier}>"
+
+class OperatorScore(db.Model):
+    """
+    Materialized per-operator totals, kept in step with the QSOs and
+    multipliers by app.standings so leaderboards never rescore on read.
+    """
+    __tablename__ = "operator_scores"
+
+    id = db.Column(db.Integer, primary_key=True)
+    operator = db.Column(db.String(20), unique=True, nullable=False)
+    total_score = db.Column(db.Float, nullable=False, default=0, index=True)
+    total_qsos = db.Column(db.Integer, nullable=False, default=0)
+    days = db.Column(db.Integer, nullable=False, default=0)
+    # Comma-separated, sorted park refs
+    parks = db.Column(db.Text, nullable=False, default="")
+
+    def __repr__(self):
+        return f"<OperatorScore {self.operator} {self.total_score}>"
+
+
+class DayParkScore(db.Model):
+    """Materialized score for one operator, date and park."""
+    __tablename__ = "day_park_scores"
+
+    id = db.Column(db.Integer, primary_key=True)
+    operator = db.Column(db.String(20), nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False)
+    park_code = db.Column(db.String(20), nullable=False)
+    score = db.Column(db.Float, nullable=False, default=0)
+    qso_count = db.Column(db.Integer, nullable=False, default=0)
+    is_new_park = db.Column(db.Boolean, nullable=False, default=False)
+    daily_multiplier = db.Column(db.Float, nullable=False, default=1.0)
+    daily_multiplier_reason = db.Column(db.String(255))
+
+    def __repr__(self):
+        return f"<DayParkScore {self.operator} {self.date} {self.park_code} {self.score}>"
+
+
+class DataVersion(db.Model):
+    """
+    Single-row counter bumped in the same transaction as every change to
+    the standings, so all workers agree on when cached pages are stale.
+    """
+    __tablename__ = "data_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Unix timestamp of the last bump
+    changed_at = db.Column(db.Float, nullable=False)
+
+
+class Upload(db.Model):
+    """
+    One uploaded ADIF file in instance/uploads. Written when the file is
+    saved so admin pages can list uploads without touching the disk.
+    """
+    __tablename__ = "uploads"
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    sha256 = db.Column(db.String(64), unique=True, index=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    # Unix timestamp of the file's mtime
+    uploaded_at = db.Column(db.Float, nullable=False, index=True)
+    qso_count = db.Column(db.Integer, nullable=False, default=0)
+    # "pending" until accepted, then "imported"
+    status = db.Column(db.String(20), nullable=False, default="pending", index=True)
+    log_id = db.Column(db.Integer, db.ForeignKey("logs.id"))
+
+    def __repr__(self):
+        return f"<Upload {self.filename} {self.status}>"
+
+
+class ImportJob(db.Model):
+    """
+    A queued background job: an ADIF import (kind "import") or a full
+    rescore (kind "rescore"). Lives in its own SQLite file (the "jobs"
+    bind) so progress updates never wait on the job's write transaction.
+    """
+    __tablename__ = "import_jobs"
+    __bind_key__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, default="import", server_default="import")
+    filename = db.Column(db.String(255), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    records_parsed = db.Column(db.Integer, nullable=False, default=0)
+    records_inserted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    worker_pid = db.Column(db.Integer)
+
+    # Unix timestamps, matching the upload mtimes shown on admin pages
+    created_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
+
+    def to_dict(self):
+        start = self.started_at or self.created_at
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "records_parsed": self.records_parsed,
+            "records_inserted": self.records_inserted,
+            "records_skipped": self.records_parsed - self.records_inserted,
+            "elapsed": round(end - start, 2),
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"<ImportJob {self.id} {self.filename} {self.status}>"
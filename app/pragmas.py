@@ -0,0 +1,83 @@
+"""
+SQLite connection settings.
+
+Every connection the app opens (the main database, the jobs bind and the
+page cache) gets the same pragmas, read from the environment (.env) in
+create_app:
+
+  SQLITE_JOURNAL_MODE  WAL        readers keep working while an import
+                                  holds the write lock; DELETE restores
+                                  the rollback journal (needed if the
+                                  instance folder is on a network share)
+  SQLITE_BUSY_TIMEOUT  5000       ms a connection waits for a lock before
+                                  "database is locked"
+  SQLITE_SYNCHRONOUS   NORMAL     fsync at WAL checkpoints only; a power
+                                  cut can lose the last commits but not
+                                  corrupt the file
+  SQLITE_CACHE_SIZE    -32000     page cache per connection (negative
+                                  values are KiB, positive are pages)
+  SQLITE_MMAP_SIZE     268435456  bytes of the file read through mmap;
+                                  0 turns it off
+
+journal_mode is stored in the database file; the others are per
+connection, which is why they are set in a connect-event listener.
+
+WAL does not make an import faster: alone it takes about as long under
+either journal mode. What changes is that readers are no longer stalled
+for the length of the import, so on a machine with few cores they share
+the CPU with it and the import takes longer while pages are being
+served (python -m benchmarks.concurrency shows both).
+"""
+
+import os
+
+from sqlalchemy import event
+
+from app import db
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL")
+SYNCHRONOUS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def pragmas_from_env():
+    """The pragmas to apply, in order, as {name: value}."""
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of {', '.join(JOURNAL_MODES)}")
+
+    synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    if synchronous not in SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS)}")
+
+    # busy_timeout first: switching to WAL needs a lock another worker
+    # may be holding at startup
+    return {
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -32000)),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),
+    }
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run PRAGMA name = value for each pragma on a DB-API connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def init_app(flask_app):
+    """Apply SQLITE_PRAGMAS to every new connection of the app's SQLite engines."""
+    pragmas = flask_app.config["SQLITE_PRAGMAS"]
+
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", on_connect)
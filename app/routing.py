@@ -1,23 +1,55 @@
-from flask import Blueprint, render_template, request, current_app as app, redirect, url_for, send_from_directory
-from hamutils.adif import ADIReader
-from collections import defaultdict
-from sqlalchemy.orm import joinedload
+from flask import Blueprint, render_template, request, current_app as app, redirect, url_for, send_from_directory, jsonify, session
+import csv
+import hashlib
 import io
+import json
 import os
-from app.importer import import_adif_file
+import uuid
+from datetime import datetime, timezone
+from app.adif import ALLOWED_EXTENSIONS, ADIFReader, open_adif, read_adif, write_record
 from app import db
-from app.models import QSO, Log
-from app.scoring import score_qsos_for_operator
+from app.importer import HASH_CHUNK_SIZE, find_imported_log
+from app.jobs import (
+    active_jobs_by_filename, active_rescore_job, cancel_active_jobs, enqueue_import, enqueue_rescore,
+    failed_jobs_by_filename,
+)
+from app.leaderboard import standings_events, standings_hub
+from app.models import QSO, ImportJob, Upload
+from app.uploads import find_upload, index_upload
+from app.cache import bump_data_version, cached, cached_page, current_version, version_changed_at
+from app.seasons import ArchiveError, archive_season, archived_seasons, load_season_standings
+from app.snapshot import send_snapshot
+from app.standings import load_daily, load_standings, recompute_operator, score_all
+from app.trace import capture_trace
 from .auth_utils import admin_required
 bp = Blueprint("main", __name__)
 
-ALLOWED_EXTENSIONS = {"adi", "adif"}
-
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def save_stream(stream, path):
+    """Write an upload stream to path in chunks and return its sha256."""
+    h = hashlib.sha256()
+    with open(path, "wb") as out:
+        for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+            out.write(chunk)
+    return h.hexdigest()
+
+
+def unique_filename(directory, filename):
+    """Return filename, or filename-N.ext if that name is already taken."""
+    stem, ext = os.path.splitext(filename)
+    candidate = filename
+    n = 1
+    while os.path.exists(os.path.join(directory, candidate)):
+        candidate = f"{stem}-{n}{ext}"
+        n += 1
+    return candidate
+
+
 # -----------------------------
 # INDEX ROUTES
 # -----------------------------
@@ -58,18 +90,39 @@ def upload():
             upload_dir = os.path.join(app.instance_path, "uploads")
             os.makedirs(upload_dir, exist_ok=True)
 
-            save_path = os.path.join(upload_dir, file.filename)
-            file.save(save_path)
-
-            # Count QSOs for display
-            with open(save_path, "r", encoding="utf-8") as f:
-                reader = ADIReader(f)
-                qso_count = sum(1 for _ in reader)
+            tmp_dir = os.path.join(app.instance_path, "tmp")
+            os.makedirs(tmp_dir, exist_ok=True)
+
+            # Stream to a temp file, hashing as we go
+            tmp_path = os.path.join(tmp_dir, f"upload-{uuid.uuid4().hex}.tmp")
+            digest = save_stream(file.stream, tmp_path)
+
+            # Duplicate content is found through the hash indexes, no file reads
+            error = None
+            existing = find_upload(digest)
+            imported_log = find_imported_log(digest)
+            if imported_log or (existing and existing.status == "imported"):
+                name = imported_log.filename if imported_log else existing.filename
+                error = f"This log has already been imported (as {name})."
+            elif existing:
+                error = f"This log has already been uploaded as {existing.filename} and is waiting for review."
+
+            if error:
+                os.remove(tmp_path)
+                return render_template("upload.html", title="Upload Logs", error=error)
+
+            # Different log under a taken name: keep both
+            filename = unique_filename(upload_dir, file.filename)
+            save_path = os.path.join(upload_dir, filename)
+            os.replace(tmp_path, save_path)
+
+            upload = index_upload(filename, sha256=digest)
+            db.session.commit()
 
             return render_template(
                 "upload.html",
                 title="Upload Logs",
-                success=f"Uploaded {file.filename} with {qso_count} QSOs. An admin will review it shortly."
+                success=f"Uploaded {filename} with {upload.qso_count} QSOs. An admin will review it shortly."
             )
 
         except Exception as e:
@@ -88,13 +141,7 @@ def upload():
 @bp.route("/admin")
 @admin_required
 def admin_home():
-    upload_dir = os.path.join(app.instance_path, "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    upload_count = len([
-        f for f in os.listdir(upload_dir)
-        if os.path.isfile(os.path.join(upload_dir, f))
-    ])
+    upload_count = Upload.query.count()
 
     from .models import QSO, Park
     qso_count = QSO.query.count()
@@ -105,47 +152,48 @@ def admin_home():
         title="Admin Dashboard",
         upload_count=upload_count,
         qso_count=qso_count,
-        park_count=park_count
+        park_count=park_count,
+        rescore_job=active_rescore_job(),
     )
 
 
+@bp.route("/admin/rescore", methods=["POST"])
+@admin_required
+def rescore():
+    # Queue a full rescore; the background worker scores in parallel
+    enqueue_rescore()
+    return redirect(url_for("main.admin_home"))
+
+
 # -----------------------------
 # REVIEW UPLOADS
 # -----------------------------
 @bp.route("/admin/uploads")
 @admin_required
 def review_uploads():
-    upload_dir = os.path.join(app.instance_path, "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    from .models import Log
-    imported_files = {log.filename for log in Log.query.all()}
+    pending = (
+        Upload.query
+        .filter_by(status="pending")
+        .order_by(Upload.uploaded_at)
+        .all()
+    )
+    jobs = active_jobs_by_filename()
+    failures = failed_jobs_by_filename()
 
     files = []
-
-    for filename in os.listdir(upload_dir):
-        if filename in imported_files:
-            continue  # hide imported files
-
-        full_path = os.path.join(upload_dir, filename)
-        if not os.path.isfile(full_path):
-            continue
-
-        size = os.path.getsize(full_path)
-        uploaded = os.path.getmtime(full_path)
-
-        try:
-            with open(full_path, "r", encoding="utf-8") as f:
-                reader = ADIReader(f)
-                qso_count = sum(1 for _ in reader)
-        except Exception:
-            qso_count = 0
-
+    for u in pending:
+        # Only a failure of this upload, not of an earlier file with
+        # the same name
+        failed = failures.get(u.filename)
+        if failed and failed.created_at < u.uploaded_at:
+            failed = None
         files.append({
-            "name": filename,
-            "size": size,
-            "uploaded": uploaded,
-            "qso_count": qso_count
+            "name": u.filename,
+            "size": u.size,
+            "uploaded": u.uploaded_at,
+            "qso_count": u.qso_count,
+            "job": jobs.get(u.filename),
+            "failed_job": failed,
         })
 
     return render_template(
@@ -164,12 +212,20 @@ def accept_upload(filename):
     if not os.path.isfile(full_path):
         return "File not found", 404
 
-    try:
-        # Use the importer to add to database
-        import_adif_file(full_path, filename)
-        return redirect(url_for("main.review_uploads"))
-    except Exception as e:
-        return f"Error importing file: {e}", 500
+    # Queue the import; the background worker does the actual work
+    enqueue_import(filename)
+    return redirect(url_for("main.review_uploads"))
+
+
+@bp.route("/admin/jobs/<int:job_id>")
+@admin_required
+def job_status(job_id):
+    """JSON progress for a background job"""
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(job.to_dict())
 
 
 @bp.route("/admin/uploads/reject/<filename>", methods=["POST"])
@@ -182,6 +238,9 @@ def reject_upload(filename):
     if os.path.isfile(full_path):
         os.remove(full_path)
 
+    Upload.query.filter_by(filename=filename).delete()
+    db.session.commit()
+
     # Return to the review page
     return redirect(url_for("main.review_uploads"))
 
@@ -207,13 +266,7 @@ def edit_upload(filename):
     if not os.path.isfile(full_path):
         return "File not found", 404
 
-    with open(full_path, "r", encoding="utf-8") as f:
-        reader = ADIReader(f)
-        qsos = list(reader)
-
-    editable_qsos = []
-    for q in qsos:
-        editable_qsos.append({k.lower(): v for k, v in q.items()})
+    editable_qsos = list(read_adif(full_path))
 
     seen = set()
     duplicates = set()
@@ -265,9 +318,10 @@ def save_edit_upload(filename):
 
     with open(full_path, "w", encoding="utf-8") as f:
         for q in qsos:
-            for k, v in q.items():
-                f.write(f"<{k}:{len(v)}>{v}")
-            f.write("<EOR>\n")
+            write_record(f, q)
+
+    index_upload(filename)
+    db.session.commit()
 
     return redirect(url_for("main.edit_upload", filename=filename))
 
@@ -281,33 +335,21 @@ def delete_qso_from_upload(filename, index):
     if not os.path.isfile(full_path):
         return "File not found", 404
 
-    # Read entire file
-    with open(full_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Split into header + QSO blocks
-    if "<EOH>" not in content:
-        return "Invalid ADIF: missing <EOH>", 400
-
-    header, body = content.split("<EOH>", 1)
-    header = header.strip() + "\n<EOH>\n"
+    # Stream every record except the deleted one into a temp file,
+    # then swap it in so the upload is never half-written
+    tmp_path = full_path + ".tmp"
+    with open_adif(full_path) as src, open(tmp_path, "w", encoding="utf-8") as dst:
+        reader = ADIFReader(src)
+        for i, record in enumerate(reader):
+            if i == 0 and reader.header is not None:
+                dst.write(reader.header + "\n<EOH>\n")
+            if i != index:
+                write_record(dst, record)
 
-    # Split QSOs by <EOR>
-    qso_blocks = [b.strip() for b in body.split("<EOR>") if b.strip()]
+    os.replace(tmp_path, full_path)
 
-    # Remove selected QSO
-    if 0 <= index < len(qso_blocks):
-        qso_blocks.pop(index)
-
-    # Reassemble ADIF
-    new_body = ""
-    for block in qso_blocks:
-        new_body += block + " <EOR>\n"
-
-    # Write back
-    with open(full_path, "w", encoding="utf-8") as f:
-        f.write(header)
-        f.write(new_body)
+    index_upload(filename)
+    db.session.commit()
 
     return redirect(url_for("main.edit_upload", filename=filename))
 
@@ -317,21 +359,14 @@ def delete_qso_from_upload(filename, index):
 @bp.route("/admin/files")
 @admin_required
 def file_manager():
-    upload_dir = os.path.join(app.instance_path, "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    files = []
-    for filename in os.listdir(upload_dir):
-        full_path = os.path.join(upload_dir, filename)
-        if os.path.isfile(full_path):
-            size = os.path.getsize(full_path)
-            uploaded = os.path.getmtime(full_path)
-
-            files.append({
-                "name": filename,
-                "size": size,
-                "uploaded": uploaded
-            })
+    files = [
+        {
+            "name": u.filename,
+            "size": u.size,
+            "uploaded": u.uploaded_at,
+        }
+        for u in Upload.query.order_by(Upload.uploaded_at).all()
+    ]
 
     return render_template(
         "admin_files.html",
@@ -361,51 +396,70 @@ def download_file(filename):
 @bp.route("/admin/scoring")
 @admin_required
 def scoring_overview():
-    # Load all QSOs with their logs
-    qsos = (
-        db.session.query(QSO)
-        .outerjoin(Log, QSO.log_id == Log.id)
-        .options(joinedload(QSO.log))
-        .all()
-    )
-
-    print("QSOs loaded:", len(qsos))
-
-    # Group QSOs by operator
-    qsos_by_operator = defaultdict(list)
-    for qso in qsos:
-        if not qso.log:
-            continue
+    # Summary table only; each operator's daily breakdown is fetched
+    # from scoring_breakdown when it is expanded
+
+    # ?trace=<operator> rescores that operator with the scoring trace
+    # captured and shows it; that is per request, so it skips the cache
+    trace_operator = request.args.get("trace", "").strip().upper()
+    if trace_operator:
+        with capture_trace() as buffer:
+            score_all("python", operator=trace_operator)
+        return render_template(
+            "scoring_overview.html", operators=load_standings(),
+            trace_operator=trace_operator,
+            trace=buffer.getvalue() or f"No QSOs for {trace_operator}.",
+        )
 
-        operator = (
-            qso.log.operator
-            or qso.log.station_callsign
-            or f"LOG-{qso.log.id}"
-        ).upper()
-        if not operator:
-            continue
+    # Shared across workers until the next data change
+    return cached_page(
+        "scoring_overview",
+        lambda: render_template("scoring_overview.html", operators=load_standings()),
+    )
 
-        qsos_by_operator[operator].append(qso)
 
-    print("Operators found:", list(qsos_by_operator.keys()))
+# Daily breakdown rows per page of the scoring overview; ?limit= is
+# rounded up to one of BREAKDOWN_PAGE_SIZES so it can't mint cache keys
+BREAKDOWN_PAGE_SIZE = 100
+BREAKDOWN_PAGE_SIZES = (25, 50, 100, 250, 1000)
 
-    operator_results = []
-    for operator, op_qsos in qsos_by_operator.items():
-        result = score_qsos_for_operator(op_qsos, operator_name=operator)  # Pass operator name
-        summary = result["by_operator"]
 
-        operator_results.append({
+@bp.route("/admin/scoring/<operator>/breakdown")
+@admin_required
+def scoring_breakdown(operator):
+    """JSON page of one operator's (date, park) scores, cached per data version"""
+    operator = operator.upper()
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    requested = request.args.get("limit", BREAKDOWN_PAGE_SIZE, type=int)
+    limit = next((size for size in BREAKDOWN_PAGE_SIZES if size >= requested), BREAKDOWN_PAGE_SIZES[-1])
+
+    def build():
+        days = list(load_daily(operator).get(operator, {}).values())
+        return json.dumps({
             "operator": operator,
-            "total_score": summary["total_score"],
-            "total_qsos": summary["total_qsos"],
-            "days": summary["days"],
-            "parks": sorted(summary["parks"]),
-            "daily": result["daily"],
+            "total": len(days),
+            "offset": offset,
+            "limit": limit,
+            "days": [
+                {
+                    "date": day["date"].isoformat(),
+                    "park_code": day["park_code"],
+                    "score": day["score"],
+                    "qso_count": day["qso_count"],
+                    "is_new_park": day["is_new_park"],
+                    "daily_multiplier": day["daily_multiplier"],
+                    "daily_multiplier_reason": day["daily_multiplier_reason"],
+                }
+                for day in days[offset:offset + limit]
+            ],
         })
 
-    operator_results.sort(key=lambda r: r["total_score"], reverse=True)
-
-    return render_template("scoring_overview.html", operators=operator_results)
+    # Only whole pages are cached; other offsets are built every time
+    if offset % limit:
+        body = build()
+    else:
+        body = cached(f"breakdown:{operator}:{offset}:{limit}", build)
+    return app.response_class(body, mimetype="application/json")
 
 
 @bp.route("/admin/scoring/multiplier/<operator>/<date_str>", methods=["GET", "POST"])
@@ -430,6 +484,7 @@ def set_daily_multiplier(operator, date_str):
             
             if dm:
                 db.session.delete(dm)
+                recompute_operator(operator)
                 db.session.commit()
             
             return redirect(url_for("main.scoring_overview"))
@@ -450,6 +505,7 @@ def set_daily_multiplier(operator, date_str):
         
         dm.multiplier = multiplier
         dm.reason = reason
+        recompute_operator(operator)
         db.session.commit()
         
         return redirect(url_for("main.scoring_overview"))
@@ -501,46 +557,159 @@ def debug_qsos():
 @bp.route("/leaders")
 def leaderboard():
     """Public leaderboard - no login required"""
-    # Load all QSOs with their logs
-    qsos = (
-        db.session.query(QSO)
-        .outerjoin(Log, QSO.log_id == Log.id)
-        .options(joinedload(QSO.log))
-        .all()
+    # Anonymous visitors get the file pre-rendered at the last data change
+    if not session.get("user"):
+        response = send_snapshot()
+        if response is not None:
+            return response
+
+    # Standings are kept up to date by imports and multiplier edits, and
+    # the rendered page is shared across workers until the next change
+    def render():
+        # Version first: if a write lands in between, the page is newer
+        # than it claims and the live stream just resends a few rows
+        version = current_version()
+        return render_template(
+            "leaderboard.html", operators=load_standings(), version=version, seasons=archived_seasons()
+        )
+
+    return cached_page("leaders", render)
+
+
+@bp.route("/leaders/<int:year>")
+def season_leaderboard(year):
+    """Final standings of an archived season, read from its archive"""
+    seasons = archived_seasons()
+    if year not in seasons:
+        return "Season not found", 404
+
+    # Archives never change, but the version-keyed page cache still saves
+    # reopening one on every request
+    def render():
+        return render_template(
+            "leaderboard.html", operators=load_season_standings(year), season=year, seasons=seasons
+        )
+
+    return cached_page(f"leaders-{year}", render)
+
+
+@bp.route("/leaders/stream")
+def leaderboard_stream():
+    """Server-Sent Events: rank/score changes as imports and edits commit"""
+    # EventSource sends Last-Event-ID (the last version it saw) on reconnect
+    since = request.headers.get("Last-Event-ID") or request.args.get("since", "")
+    since = int(since) if since.isdigit() else None
+
+    # Streams hold a worker thread each, so a process only takes a few
+    hub = standings_hub(app._get_current_object())
+    subscription = hub.subscribe()
+    if subscription is None:
+        return "Too many live viewers; reload for the latest standings", 503
+
+    response = app.response_class(standings_events(subscription, since), mimetype="text/event-stream")
+    # Runs even if the client goes away before the first event
+    response.call_on_close(lambda: hub.unsubscribe(subscription[0]))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let nginx buffer events
+    return response
+
+# -----------------------------
+# LEADERBOARD API
+# -----------------------------
+LEADERBOARD_CSV_FIELDS = ["rank", "operator", "total_score", "total_qsos", "days", "parks"]
+
+
+@bp.route("/api/leaderboard")
+@bp.route("/api/leaderboard.<fmt>")
+def leaderboard_api(fmt=None):
+    """
+    Standings as JSON (default) or CSV (?format=csv or /api/leaderboard.csv),
+    with ?top=N and ?offset=M paging. The ETag and Last-Modified come from
+    the data version, so unchanged standings answer 304 without a query
+    beyond the version lookup.
+    """
+    fmt = (fmt or request.args.get("format", "json")).lower()
+    if fmt not in ("json", "csv"):
+        return jsonify({"error": "format must be json or csv"}), 400
+    top = request.args.get("top", type=int)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    if top is not None and top < 0:
+        return jsonify({"error": "top must be positive"}), 400
+
+    version = current_version()
+    changed_at = version_changed_at()
+    # changed_at keeps tags unique even if a recreated database restarts the counter
+    etag = f"v{version}.{int((changed_at or 0) * 1000)}-{fmt}-{offset}-{'all' if top is None else top}"
+    last_modified = (
+        datetime.fromtimestamp(int(changed_at), timezone.utc) if changed_at else None
     )
 
-    # Group QSOs by operator
-    qsos_by_operator = defaultdict(list)
-    for qso in qsos:
-        if not qso.log:
-            continue
-
-        operator = (
-            qso.log.operator
-            or qso.log.station_callsign
-            or f"LOG-{qso.log.id}"
-        ).upper()
-        if not operator:
-            continue
-
-        qsos_by_operator[operator].append(qso)
-
-    # Calculate scores for each operator
-    operator_results = []
-    for operator, op_qsos in qsos_by_operator.items():
-        result = score_qsos_for_operator(op_qsos)
-        summary = result["by_operator"]
-
-        operator_results.append({
-            "operator": operator,
-            "total_score": summary["total_score"],
-            "parks": sorted(summary["parks"]),
-        })
+    # If-None-Match wins over If-Modified-Since when both are sent. It
+    # uses the weak comparison: nginx's gzip filter hands clients W/ tags
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = bool(since and last_modified and last_modified <= since)
+
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        rows = [
+            {"rank": offset + i + 1, **row}
+            for i, row in enumerate(load_standings(limit=top, offset=offset))
+        ]
+        if fmt == "csv":
+            out = io.StringIO()
+            writer = csv.DictWriter(out, fieldnames=LEADERBOARD_CSV_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "parks": " ".join(row["parks"])})
+            response = app.response_class(out.getvalue(), mimetype="text/csv")
+        else:
+            response = jsonify({"version": version, "offset": offset, "operators": rows})
 
-    # Sort by score descending
-    operator_results.sort(key=lambda r: r["total_score"], reverse=True)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Clients may keep a copy but must revalidate it on every use
+    response.cache_control.no_cache = True
+    return response
+
+
+# -----------------------------
+# SEASON ARCHIVE
+# -----------------------------
+@bp.route("/admin/archive", methods=["GET", "POST"])
+@admin_required
+def archive():
+    """
+    End the season: archive the database and uploads under a year and
+    start the next season empty. Past leaderboards stay at /leaders/<year>.
+    """
+    year = request.form.get("year", type=int) or datetime.now().year
+    context = {"title": "Archive Season", "year": year, "seasons": archived_seasons()}
+
+    if request.method == "POST":
+        if request.form.get("confirmation", "").strip().upper() != f"ARCHIVE {year}":
+            return render_template(
+                "admin_archive.html", error=f"You must type 'ARCHIVE {year}' to confirm.", **context
+            )
+        try:
+            path, moved = archive_season(year)
+        except ArchiveError as e:
+            return render_template("admin_archive.html", error=str(e), **context)
+
+        context["seasons"] = archived_seasons()
+        return render_template(
+            "admin_archive.html",
+            success=f"Season {year} archived to {os.path.basename(path)} with {moved} uploaded files. "
+                    "The live tables are empty and ready for the next season.",
+            **context,
+        )
+
+    return render_template("admin_archive.html", **context)
 
-    return render_template("leaderboard.html", operators=operator_results)
 
 # -----------------------------
 # MASTER RESET (DANGEROUS!)
@@ -564,15 +733,25 @@ def master_reset():
         
         try:
             # Delete all database records
-            from .models import QsoPark, QSO, Park, Log
+            from .models import QsoPark, QSO, Park, Log, OperatorScore, DayParkScore
             
             print("Deleting all database records...")
+            db.session.query(DayParkScore).delete()
+            db.session.query(OperatorScore).delete()
             db.session.query(QsoPark).delete()
             db.session.query(QSO).delete()
             db.session.query(Park).delete()
+            # Upload rows go with their files, or re-uploading one would
+            # be refused as already imported
+            db.session.query(Upload).delete()
             db.session.query(Log).delete()
+            bump_data_version()
             db.session.commit()
             print("✓ Database cleared")
+
+            cancelled = cancel_active_jobs("Cancelled by master reset")
+            if cancelled:
+                print(f"✓ Cancelled {cancelled} queued or running jobs")
             
             # Delete all uploaded files
             upload_dir = os.path.join(app.instance_path, "uploads")
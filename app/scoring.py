@@ -1,6 +1,7 @@
 from collections import defaultdict
 from datetime import datetime
 from app import db
+from app.trace import scoring_log, trace_enabled
 
 VALID_MODES = {"SSB", "CW",}
 
@@ -17,27 +18,61 @@ def get_qso_park_code(qso):
     Returns YOUR park code for the QSO (e.g. 'US-9317').
     Only looks at MY park (where you're activating from), not their park.
     """
-    # Check the linked parks - but we need to verify it's from MY_SIG_INFO
-    if qso.parks:
-        # The park was linked during import from MY_SIG_INFO or similar fields
-        return qso.parks[0].park.park_ref
-    return None
+    # Stored at import time from MY_SIG_INFO or similar fields
+    return qso.park_ref
 
 
 def get_qso_power(qso):
     """
     Returns TX power as a float, or None if missing/invalid.
     """
-    p = getattr(qso, "tx_pwr", None)
-    if p is None:
-        return None
-    try:
-        return float(p)
-    except (TypeError, ValueError):
-        return None
+    return qso.tx_pwr
+
+
+def score_breakdown(is_new_park, qrp_power, daily_mult):
+    """Trace text for how one QSO's score was built, e.g. "2 base ×2 QRP (5.0W)"."""
+    parts = ["2 base"]
+    if is_new_park:
+        parts.append("×2 new park")
+    if qrp_power is not None:
+        parts.append(f"×2 QRP ({qrp_power}W)")
+    if daily_mult != 1.0:
+        parts.append(f"×{daily_mult} bonus")
+    return " ".join(parts)
+
+
+class ScoringContext:
+    """
+    Data shared by every operator's scoring, loaded once up front:
+    daily multipliers keyed by (operator, date).
+    """
+
+    def __init__(self, multipliers):
+        # {(operator, date): {"multiplier": float, "reason": str}}
+        self.multipliers = multipliers
+        self._by_operator = defaultdict(dict)
+        for (operator, date), bonus in multipliers.items():
+            self._by_operator[operator][date] = bonus
+
+    @classmethod
+    def load(cls, operator=None):
+        """Load the daily multipliers (all, or one operator's) in one query."""
+        from .models import DailyMultiplier
+
+        query = DailyMultiplier.query
+        if operator:
+            query = query.filter_by(operator=operator)
+        return cls({
+            (bonus.operator, bonus.date): {"multiplier": bonus.multiplier, "reason": bonus.reason}
+            for bonus in query
+        })
 
+    def bonuses_for(self, operator):
+        """{date: {"multiplier": ..., "reason": ...}} for one operator."""
+        return self._by_operator.get(operator, {})
 
-def score_qsos_for_operator(qsos, operator_name=None):
+
+def score_qsos_for_operator(qsos, operator_name=None, context=None):
     """
     Score QSOs for a single operator across all days/parks.
     
@@ -53,6 +88,9 @@ def score_qsos_for_operator(qsos, operator_name=None):
     - Day 4 @ US-2281 (repeat): 2 pts (4 if QRP)
     
     Maximum: 2 × 2 × 2 = 8 points per QSO
+
+    Pass a ScoringContext when scoring many operators so the daily
+    multipliers are loaded once instead of once per operator.
     
     Returns:
         {
@@ -75,24 +113,25 @@ def score_qsos_for_operator(qsos, operator_name=None):
           }
         }
     """
-    print(f"\n=== SCORING DEBUG: Processing {len(qsos)} QSOs ===")
+    trace = trace_enabled()
+    if trace:
+        scoring_log.debug("=== SCORING: %s, %d QSOs ===", operator_name, len(qsos))
     
-    # Load daily multipliers for this operator if provided
-    from .models import DailyMultiplier
+    # Daily multipliers for this operator, from a preloaded context when
+    # scoring many operators (one query total) or loaded here otherwise
     daily_bonuses = {}
     if operator_name:
-        bonuses = DailyMultiplier.query.filter_by(operator=operator_name).all()
-        for bonus in bonuses:
-            daily_bonuses[bonus.date] = {
-                'multiplier': bonus.multiplier,
-                'reason': bonus.reason
-            }
-        print(f"Loaded {len(daily_bonuses)} daily bonus multipliers for {operator_name}")
+        if context is None:
+            context = ScoringContext.load(operator_name)
+        daily_bonuses = context.bonuses_for(operator_name)
+        if trace:
+            scoring_log.debug("Loaded %d daily bonus multipliers for %s", len(daily_bonuses), operator_name)
     
     # Sort all QSOs by datetime to process chronologically
     sorted_qsos = sorted([q for q in qsos if q.datetime_on], key=lambda q: q.datetime_on)
     
-    print(f"QSOs with valid dates: {len(sorted_qsos)}")
+    if trace:
+        scoring_log.debug("QSOs with valid dates: %d", len(sorted_qsos))
     
     # Track which parks have been activated
     parks_activated = {}  # park_code -> date first activated
@@ -116,7 +155,8 @@ def score_qsos_for_operator(qsos, operator_name=None):
     for qso_date in sorted(day_park_qsos.keys()):
         parks_dict = day_park_qsos[qso_date]
         
-        print(f"\n--- Processing date: {qso_date} ---")
+        if trace:
+            scoring_log.debug("--- Processing date: %s ---", qso_date)
         
         for park_code, qsos_list in parks_dict.items():
             # Check if this is a NEW park (never activated before)
@@ -127,12 +167,14 @@ def score_qsos_for_operator(qsos, operator_name=None):
                 is_new_park = False
                 is_very_first_park = False
                 parks_activated[park_code] = qso_date
-                print(f"🏁 FIRST PARK EVER: {park_code} (no bonus - this is your starting park)")
+                if trace:
+                    scoring_log.debug("🏁 FIRST PARK EVER: %s (no bonus - this is your starting park)", park_code)
             elif is_new_park:
                 parks_activated[park_code] = qso_date
-                print(f"✨ NEW PARK: {park_code} (first activation - all QSOs get 2× multiplier!)")
-            else:
-                print(f"Repeat park: {park_code} (first was on {parks_activated[park_code]})")
+                if trace:
+                    scoring_log.debug("✨ NEW PARK: %s (first activation - all QSOs get 2× multiplier!)", park_code)
+            elif trace:
+                scoring_log.debug("Repeat park: %s (first was on %s)", park_code, parks_activated[park_code])
             
             qso_scores = {}
             day_score = 0
@@ -143,15 +185,16 @@ def score_qsos_for_operator(qsos, operator_name=None):
             daily_mult = daily_bonus['multiplier']
             daily_reason = daily_bonus['reason']
             
-            if daily_mult != 1.0:
-                print(f"📌 Daily bonus: ×{daily_mult} - {daily_reason}")
+            if trace and daily_mult != 1.0:
+                scoring_log.debug("📌 Daily bonus: ×%s - %s", daily_mult, daily_reason)
             
             for qso in sorted(qsos_list, key=lambda q: q.datetime_on):
                 mode = (qso.mode or "").upper()
                 
                 # Check valid mode
                 if mode not in VALID_MODES:
-                    print(f"  QSO {qso.id}: INVALID MODE '{mode}' - skipped")
+                    if trace:
+                        scoring_log.debug("  QSO %s: INVALID MODE '%s' - skipped", qso.id, mode)
                     qso_scores[qso.id] = 0
                     skipped_mode += 1
                     continue
@@ -159,23 +202,20 @@ def score_qsos_for_operator(qsos, operator_name=None):
                 # Calculate score with MULTIPLIERS
                 score = 2  # Base points
                 multiplier = 1
-                score_breakdown = ["2 base"]
                 
                 # New park multiplier (×2)
                 if is_new_park:
                     multiplier *= 2
-                    score_breakdown.append("×2 new park")
                 
                 # QRP multiplier (×2)
                 power = get_qso_power(qso)
-                if power is not None and power <= 5:
+                qrp = power is not None and power <= 5
+                if qrp:
                     multiplier *= 2
-                    score_breakdown.append(f"×2 QRP ({power}W)")
                 
                 # Daily bonus multiplier
                 if daily_mult != 1.0:
                     multiplier *= daily_mult
-                    score_breakdown.append(f"×{daily_mult} bonus")
                 
                 score = score * multiplier
                 
@@ -183,11 +223,16 @@ def score_qsos_for_operator(qsos, operator_name=None):
                 day_score += score
                 total_qsos += 1
                 
-                print(f"  QSO {qso.id}: {score} pts [{' '.join(score_breakdown)}] - {qso.call} on {mode}")
+                if trace:
+                    scoring_log.debug(
+                        "  QSO %s: %s pts [%s] - %s on %s", qso.id, score,
+                        score_breakdown(is_new_park, power if qrp else None, daily_mult), qso.call, mode,
+                    )
             
-            print(f"Park {park_code} subtotal: {day_score} pts from {len(qso_scores)} QSOs")
-            if skipped_mode > 0:
-                print(f"  (skipped {skipped_mode} QSOs due to invalid mode)")
+            if trace:
+                scoring_log.debug("Park %s subtotal: %s pts from %d QSOs", park_code, day_score, len(qso_scores))
+                if skipped_mode > 0:
+                    scoring_log.debug("  (skipped %d QSOs due to invalid mode)", skipped_mode)
             
             daily_results[(qso_date, park_code)] = {
                 "qsos": qsos_list,
@@ -202,11 +247,12 @@ def score_qsos_for_operator(qsos, operator_name=None):
             
             total_score += day_score
     
-    print(f"\n=== FINAL TOTALS ===")
-    print(f"Total score: {total_score}")
-    print(f"Total QSOs counted: {total_qsos}")
-    print(f"Unique parks activated: {len(parks_activated)}")
-    print(f"Days active: {len(day_park_qsos)}")
+    if trace:
+        scoring_log.debug("=== FINAL TOTALS ===")
+        scoring_log.debug("Total score: %s", total_score)
+        scoring_log.debug("Total QSOs counted: %d", total_qsos)
+        scoring_log.debug("Unique parks activated: %d", len(parks_activated))
+        scoring_log.debug("Days active: %d", len(day_park_qsos))
     
     return {
         "daily": daily_results,
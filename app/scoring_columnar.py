@@ -0,0 +1,188 @@
+"""
+Columnar scoring engine.
+
+Scores every operator at once from flat columns instead of ORM objects:
+one SELECT pulls (operator, id, datetime_on, park_ref, mode, tx_pwr), and
+the rules from app.scoring (new-park, QRP and daily multipliers) are
+applied with NumPy sorts, first-occurrence lookups and grouped sums.
+
+Produces the same {"daily": ..., "by_operator": ...} structure as
+score_qsos_for_operator, except that "qsos" in each daily entry holds
+QSO ids rather than QSO objects.
+
+Requires numpy (in requirements.txt); it is imported only when this
+engine is used, and create_app checks for it when SCORING_ENGINE is
+"columnar".
+"""
+
+from sqlalchemy import select
+
+from app import db
+from app.models import QSO, Log, Operator
+from app.scoring import VALID_MODES, ScoringContext
+
+
+def require_numpy():
+    """The numpy module, or RuntimeError if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("The columnar scoring engine requires numpy (pip install numpy)")
+    return numpy
+
+
+def load_columns(operator=None):
+    """QSOs as (operator, id, datetime_on, park_ref, mode, tx_pwr) rows, in one query."""
+    query = (
+        select(Operator.callsign, QSO.id, QSO.datetime_on, QSO.park_ref, QSO.mode, QSO.tx_pwr)
+        .select_from(QSO)
+        .join(Log, QSO.log_id == Log.id)
+        .join(Operator, Log.operator_id == Operator.id)
+        .order_by(QSO.id)
+    )
+    if operator:
+        query = query.where(Operator.callsign == operator)
+    return db.session.execute(query).all()
+
+
+def load_multipliers(operator=None):
+    """{(operator, date): (multiplier, reason)} for the daily multipliers."""
+    return {
+        key: (bonus["multiplier"], bonus["reason"])
+        for key, bonus in ScoringContext.load(operator).multipliers.items()
+    }
+
+
+def score_columns(rows, multipliers):
+    """
+    Score (operator, id, datetime_on, park_ref, mode, tx_pwr) rows for
+    every operator. Returns {operator: result} where each result has the
+    score_qsos_for_operator shape.
+    """
+    np = require_numpy()
+
+    results = {}
+    if not rows:
+        return results
+
+    operators, ids, dts, parks, modes, powers = zip(*rows)
+
+    op_names, op_idx = np.unique(np.array(operators, dtype=object).astype(str), return_inverse=True)
+    for name in op_names:
+        results[str(name)] = {
+            "daily": {},
+            "by_operator": {"total_score": 0, "total_qsos": 0, "days": 0, "parks": set()},
+        }
+
+    ids = np.array(ids, dtype=np.int64)
+    t = np.array(dts, dtype="datetime64[m]")
+    park_names, park_idx = np.unique(
+        np.array([p or "" for p in parks], dtype=object).astype(str), return_inverse=True
+    )
+    has_park = np.array([bool(p) for p in parks])
+    valid_mode = np.array([(m or "").upper() in VALID_MODES for m in modes])
+    power = np.array([np.nan if p is None else p for p in powers], dtype=float)
+    qrp = power <= 5  # NaN compares False, like a missing power
+
+    # Only dated QSOs at a park are scored
+    keep = ~np.isnat(t) & has_park
+    if not keep.any():
+        return results
+
+    # Chronological per operator; ties keep id order like a stable sort
+    rows_idx = np.nonzero(keep)[0]
+    order = rows_idx[np.lexsort((ids[rows_idx], t[rows_idx], op_idx[rows_idx]))]
+
+    s_op = op_idx[order]
+    s_day = t[order].astype("datetime64[D]")
+    s_park = park_idx[order]
+
+    # One group per (operator, date, park); its first row position gives
+    # the processing order the Python engine uses
+    day_num = s_day.astype(np.int64)
+    day_num -= day_num.min()
+    n_parks = len(park_names)
+    n_days = int(day_num.max()) + 1
+    gkey = (s_op.astype(np.int64) * n_days + day_num) * n_parks + s_park
+    _, first_pos, row_group = np.unique(gkey, return_index=True, return_inverse=True)
+    row_group = row_group.ravel()
+
+    group_order = np.argsort(first_pos, kind="stable")
+    rank = np.empty_like(group_order)
+    rank[group_order] = np.arange(len(group_order))
+    row_group = rank[row_group]            # renumber groups in processing order
+    g_first = first_pos[group_order]
+    g_op = s_op[g_first]
+    g_park = s_park[g_first]
+    g_day = s_day[g_first]
+
+    # New park = first time this operator's groups reach the park, except
+    # for the operator's very first park
+    op_first_group = np.ones(len(g_op), dtype=bool)
+    op_first_group[1:] = g_op[1:] != g_op[:-1]
+    _, park_first = np.unique(g_op.astype(np.int64) * n_parks + g_park, return_index=True)
+    is_new = np.zeros(len(g_op), dtype=bool)
+    is_new[park_first] = True
+    is_new &= ~op_first_group
+
+    # Daily multiplier per group
+    g_mult = np.ones(len(g_op))
+    g_reason = [None] * len(g_op)
+    for g in range(len(g_op)):
+        bonus = multipliers.get((str(op_names[g_op[g]]), g_day[g].item()))
+        if bonus:
+            g_mult[g], g_reason[g] = bonus
+
+    # Per-QSO scores, then grouped sums
+    s_valid = valid_mode[order]
+    factor = 2 * np.where(is_new[row_group], 2, 1) * np.where(qrp[order], 2, 1)
+    score = np.where(s_valid, factor * g_mult[row_group], 0)
+    g_score = np.bincount(row_group, weights=score, minlength=len(g_op))
+    g_valid = np.bincount(row_group, weights=s_valid, minlength=len(g_op)).astype(int)
+
+    s_ids = ids[order]
+
+    # Rows per group, in chronological order
+    group_rows = np.argsort(row_group, kind="stable")
+    group_starts = np.searchsorted(row_group[group_rows], np.arange(len(g_op) + 1))
+
+    for g in range(len(g_op)):
+        operator = str(op_names[g_op[g]])
+        park_code = str(park_names[g_park[g]])
+        date = g_day[g].item()
+        whole = g_mult[g] == 1.0
+
+        members = group_rows[group_starts[g]:group_starts[g + 1]]
+        qso_ids = [int(i) for i in s_ids[members]]
+        qso_scores = {
+            qso_id: (int(sc) if whole else float(sc))
+            for qso_id, sc in zip(qso_ids, score[members])
+        }
+        day_score = int(g_score[g]) if whole else float(g_score[g])
+
+        results[operator]["daily"][(date, park_code)] = {
+            "qsos": qso_ids,
+            "score": day_score,
+            "qso_scores": qso_scores,
+            "park_code": park_code,
+            "date": date,
+            "is_new_park": bool(is_new[g]),
+            "daily_multiplier": float(g_mult[g]),
+            "daily_multiplier_reason": g_reason[g],
+        }
+
+        summary = results[operator]["by_operator"]
+        summary["total_score"] += day_score
+        summary["total_qsos"] += int(g_valid[g])
+        summary["parks"].add(park_code)
+
+    for result in results.values():
+        result["by_operator"]["days"] = len({date for date, _ in result["daily"]})
+
+    return results
+
+
+def score_all_columnar(operator=None):
+    """Score every operator (or just operator) with the columnar engine."""
+    return score_columns(load_columns(operator), load_multipliers(operator))
+
@@ -0,0 +1,120 @@
+"""
+SQL scoring engine.
+
+Expresses the rules from app.scoring as one query so SQLite does the
+work: window functions order each operator's QSOs and find the first
+visit to every park, and the per-(operator, date, park) scores are
+aggregated in the database. Python only turns the group rows into the
+score_qsos_for_operator shape.
+
+Daily entries carry "qso_count" instead of a "qsos" list and have no
+per-QSO "qso_scores", since no QSO rows leave the database.
+"""
+
+from datetime import date
+
+from sqlalchemy import bindparam, text
+
+from app import db
+from app.scoring import VALID_MODES
+
+_SCORE_SQL = """
+WITH q AS (
+    -- Scored QSOs, numbered in the order the Python engine walks them
+    SELECT o.callsign AS operator,
+           date(q.datetime_on) AS day,
+           q.park_ref,
+           upper(coalesce(q.mode, '')) IN :modes AS valid,
+           coalesce(q.tx_pwr <= 5, 0) AS qrp,
+           ROW_NUMBER() OVER (
+               PARTITION BY o.id ORDER BY q.datetime_on, q.id
+           ) AS pos
+    FROM qsos q
+    JOIN logs l ON l.id = q.log_id
+    JOIN operators o ON o.id = l.operator_id
+    WHERE q.datetime_on IS NOT NULL AND q.park_ref IS NOT NULL AND q.park_ref != ''
+      {operator_filter}
+),
+g AS (
+    SELECT operator, day, park_ref,
+           min(pos) AS first_pos,
+           count(*) AS qso_count,
+           sum(valid) AS valid_count,
+           sum(valid AND qrp) AS qrp_count
+    FROM q
+    GROUP BY operator, day, park_ref
+),
+ranked AS (
+    -- Groups run by date, then by first QSO; a park is new on its first
+    -- visit unless it is the operator's very first group
+    SELECT g.*,
+           ROW_NUMBER() OVER (PARTITION BY operator ORDER BY day, first_pos) AS seq,
+           ROW_NUMBER() OVER (PARTITION BY operator, park_ref ORDER BY day, first_pos) AS visit
+    FROM g
+)
+SELECT r.operator, r.day, r.park_ref, r.qso_count, r.valid_count,
+       (r.visit = 1 AND r.seq > 1) AS is_new_park,
+       (2 * (r.valid_count - r.qrp_count) + 4 * r.qrp_count)
+           * (CASE WHEN r.visit = 1 AND r.seq > 1 THEN 2 ELSE 1 END) AS base_score,
+       dm.multiplier, dm.reason
+FROM ranked r
+LEFT JOIN daily_multipliers dm ON dm.operator = r.operator AND dm.date = r.day
+ORDER BY r.operator, r.seq
+"""
+
+_OPERATORS_SQL = """
+SELECT o.callsign AS operator
+FROM operators o
+WHERE EXISTS (
+    SELECT 1 FROM logs l JOIN qsos q ON q.log_id = l.id WHERE l.operator_id = o.id
+) {operator_filter}
+"""
+
+
+def _query(sql, operator):
+    operator_filter = "AND o.callsign = :operator" if operator else ""
+    return text(sql.format(operator_filter=operator_filter))
+
+
+def score_all_sql(operator=None):
+    """
+    Score every operator (or just operator) inside the database.
+    Returns {operator: result} in the score_qsos_for_operator shape.
+    """
+    params = {"operator": operator} if operator else {}
+
+    results = {}
+    for (name,) in db.session.execute(_query(_OPERATORS_SQL, operator), params):
+        results[name] = {
+            "daily": {},
+            "by_operator": {"total_score": 0, "total_qsos": 0, "days": 0, "parks": set()},
+        }
+
+    query = _query(_SCORE_SQL, operator).bindparams(bindparam("modes", expanding=True))
+    rows = db.session.execute(query, {**params, "modes": sorted(VALID_MODES)})
+
+    for row in rows:
+        day = date.fromisoformat(row.day)
+        multiplier = 1.0 if row.multiplier is None else row.multiplier
+        # Match the Python engine: scores only become floats under a bonus
+        score = row.base_score if multiplier == 1.0 else row.base_score * multiplier
+
+        results[row.operator]["daily"][(day, row.park_ref)] = {
+            "qso_count": row.qso_count,
+            "score": score,
+            "park_code": row.park_ref,
+            "date": day,
+            "is_new_park": bool(row.is_new_park),
+            "daily_multiplier": multiplier,
+            "daily_multiplier_reason": row.reason,
+        }
+
+        summary = results[row.operator]["by_operator"]
+        summary["total_score"] += score
+        summary["total_qsos"] += row.valid_count
+        summary["parks"].add(row.park_ref)
+
+    for result in results.values():
+        result["by_operator"]["days"] = len({day for day, _ in result["daily"]})
+
+    return results
@@ -0,0 +1,152 @@
+"""
+Season archives.
+
+archive_season(year) ends a season without losing it: the live database
+is copied to instance/seasons/<year>.db with the SQLite backup API, the
+uploaded logs move to instance/seasons/<year>/uploads, and the season
+tables are emptied so the next season's queries only scan its own rows.
+
+Archives are never written again. /leaders/<year> reads a past season's
+final standings through a read-only engine (mode=ro) on its archive.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from flask import current_app as app
+from sqlalchemy import create_engine, select, text
+
+from app import db
+from app.cache import bump_data_version
+from app.jobs import ACTIVE_STATUSES
+from app.models import ImportJob, OperatorScore
+from app.standings import standing_row
+
+# Emptied once the season is archived, children first. data_version is
+# kept so versions (ETags, snapshots, stream ids) keep increasing.
+SEASON_TABLES = [
+    "day_park_scores", "operator_scores", "qso_parks", "qsos", "logs",
+    "parks", "daily_multipliers", "uploads",
+]
+
+# Read-only engines of the archives this process has opened, by path
+_engines = {}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def seasons_dir():
+    path = os.path.join(app.instance_path, "seasons")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def archive_path(year):
+    return os.path.join(seasons_dir(), f"{year}.db")
+
+
+def archived_seasons():
+    """Years that have an archive, newest first."""
+    return sorted(
+        (int(name[:-3]) for name in os.listdir(seasons_dir())
+         if name.endswith(".db") and name[:-3].isdigit()),
+        reverse=True,
+    )
+
+
+# -----------------------------
+# ARCHIVING
+# -----------------------------
+def archive_season(year):
+    """
+    Archive the current season as `year` and empty the live tables.
+    Returns (archive path, number of uploads moved). Raises ArchiveError
+    if the season is already archived or a job is queued or running.
+    """
+    path = archive_path(year)
+    if os.path.exists(path):
+        raise ArchiveError(f"Season {year} is already archived")
+    if ImportJob.query.filter(ImportJob.status.in_(ACTIVE_STATUSES)).count():
+        raise ArchiveError("Imports or a rescore are still queued or running")
+
+    # Take the write lock before copying, so nothing can commit between
+    # the backup and the truncation
+    db.session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        _backup(path)
+        for table in SEASON_TABLES:
+            db.session.execute(text(f"DELETE FROM {table}"))
+        bump_data_version()
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return path, _move_uploads(year)
+
+
+def _backup(path):
+    """Copy the live database to path (via a temp file) with the SQLite backup API."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    # A second connection reads the last committed state while the
+    # session holds the write lock
+    source = db.engine.raw_connection()
+    try:
+        target = sqlite3.connect(tmp)
+        try:
+            source.driver_connection.backup(target)
+            # One self-contained file, readable without -wal/-shm files
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    finally:
+        source.close()
+
+
+def _move_uploads(year):
+    upload_dir = os.path.join(app.instance_path, "uploads")
+    if not os.path.isdir(upload_dir):
+        return 0
+
+    target = os.path.join(seasons_dir(), str(year), "uploads")
+    os.makedirs(target, exist_ok=True)
+    moved = 0
+    for filename in os.listdir(upload_dir):
+        source = os.path.join(upload_dir, filename)
+        if os.path.isfile(source):
+            shutil.move(source, os.path.join(target, filename))
+            moved += 1
+    return moved
+
+
+# -----------------------------
+# READING ARCHIVES
+# -----------------------------
+def archive_engine(year):
+    """Read-only engine on a season's archive (which must exist)."""
+    path = archive_path(year)
+    engine = _engines.get(path)
+    if engine is None:
+        engine = _engines[path] = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    return engine
+
+
+def load_season_standings(year):
+    """Final leaderboard rows of an archived season, highest score first."""
+    table = OperatorScore.__table__
+    query = select(
+        table.c.operator, table.c.total_score, table.c.total_qsos, table.c.days, table.c.parks
+    ).order_by(table.c.total_score.desc(), table.c.operator)
+    with archive_engine(year).connect() as conn:
+        return [standing_row(row) for row in conn.execute(query)]
@@ -0,0 +1,130 @@
+"""
+Pre-rendered leaderboard snapshot.
+
+After every commit that bumped the data version, the anonymous /leaders
+page is rendered once and written to instance/snapshots as
+leaders-<version>.html (plus a .gz copy), via a temp file and rename so
+readers never see a partial file. The leaderboard route serves the file
+for the current version with send_file, which gunicorn hands to
+sendfile(); it renders live only when that file does not exist yet.
+
+Naming files by version means a slow writer can never replace a newer
+snapshot with an older one, and a stale file is simply never served.
+"""
+
+import glob
+import gzip
+import os
+import tempfile
+
+from flask import current_app as app, has_app_context, render_template, request, send_file
+from sqlalchemy import event
+
+from app import db
+from app.cache import DATA_CHANGED, current_version
+
+# Snapshots kept on disk: the current one plus a couple of older ones for
+# requests that looked up the version just before a newer one was written
+KEEP = 3
+
+
+def snapshot_dir():
+    path = os.path.join(app.instance_path, "snapshots")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def snapshot_path(version, gzipped=False):
+    return os.path.join(snapshot_dir(), f"leaders-{version}.html" + (".gz" if gzipped else ""))
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_snapshot(flask_app):
+    """Render the anonymous leaderboard for the current version and store it."""
+    from app.seasons import archived_seasons
+    from app.standings import load_standings
+
+    # An app context of its own gives a separate session (so this works
+    # from inside the writer's after_commit), and the request context an
+    # anonymous nav bar
+    with flask_app.app_context(), flask_app.test_request_context("/leaders"):
+        version = current_version()
+        path = snapshot_path(version)
+        if os.path.exists(path):
+            return path
+
+        html = render_template(
+            "leaderboard.html", operators=load_standings(), version=version,
+            seasons=archived_seasons(),
+        ).encode("utf-8")
+        _write_atomic(snapshot_path(version, gzipped=True), gzip.compress(html, 6))
+        _write_atomic(path, html)
+
+        _prune()
+    return path
+
+
+def _prune():
+    """Remove all but the newest KEEP snapshots."""
+    versions = sorted(
+        int(os.path.basename(path)[len("leaders-"):-len(".html")])
+        for path in glob.glob(os.path.join(snapshot_dir(), "leaders-*.html"))
+    )
+    for old in versions[:-KEEP]:
+        for gzipped in (False, True):
+            try:
+                os.remove(snapshot_path(old, gzipped))
+            except FileNotFoundError:
+                pass
+
+
+def send_snapshot():
+    """
+    Response streaming the snapshot for the committed data version
+    (gzipped if the client accepts it), or None if there is none yet.
+    """
+    path = snapshot_path(current_version())
+    if not os.path.exists(path):
+        return None
+
+    if request.accept_encodings["gzip"] and os.path.exists(path + ".gz"):
+        response = send_file(path + ".gz", mimetype="text/html")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = send_file(path, mimetype="text/html")
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+# -----------------------------
+# WRITE ON COMMIT
+# -----------------------------
+def _after_commit(session):
+    # bump_data_version flags the transactions that change the standings
+    if not session.info.pop(DATA_CHANGED, False) or not has_app_context():
+        return
+    try:
+        write_snapshot(app._get_current_object())
+    except Exception:
+        # The snapshot is an optimization; the route renders live without it
+        app.logger.exception("Could not write the leaderboard snapshot")
+
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop(DATA_CHANGED, None)
+
+
+def init_app(flask_app):
+    if not event.contains(db.session, "after_commit", _after_commit):
+        event.listen(db.session, "after_commit", _after_commit)
+        event.listen(db.session, "after_soft_rollback", _after_soft_rollback)
@@ -0,0 +1,371 @@
+"""
+Materialized standings.
+
+operator_scores and day_park_scores hold the output of
+score_qsos_for_operator for every operator. Writers (imports, multiplier
+edits, resets) call recompute_operator for the operators they touched,
+inside their own transaction, so leaderboard reads are a single query.
+Every recompute also bumps the data version that cached pages are keyed by.
+"""
+
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+
+from flask import current_app as app
+from sqlalchemy import insert, select
+
+from app import db
+from app.cache import bump_data_version
+from app.models import QSO, Log, Operator, OperatorScore, DayParkScore
+from app.scoring import ScoringContext, score_qsos_for_operator
+
+
+def operator_name(log):
+    """The leaderboard name for a log's QSOs: its operator's callsign."""
+    return db.session.get(Operator, log.operator_id).callsign
+
+
+def score_value(value):
+    """Show whole-number scores as ints (stored as floats for bonuses like ×1.5)."""
+    return int(value) if float(value).is_integer() else value
+
+
+def qsos_for_operator(operator):
+    """Every QSO whose log belongs to operator, through the operator/log/QSO indexes."""
+    return (
+        db.session.query(QSO)
+        .join(Log, QSO.log_id == Log.id)
+        .join(Operator, Log.operator_id == Operator.id)
+        .filter(Operator.callsign == operator)
+        .order_by(QSO.id)
+        .all()
+    )
+
+
+def qsos_by_operator():
+    """Every QSO in the database grouped by operator name."""
+    rows = (
+        db.session.query(Operator.callsign, QSO)
+        .select_from(QSO)
+        .join(Log, QSO.log_id == Log.id)
+        .join(Operator, Log.operator_id == Operator.id)
+        .order_by(Operator.callsign, QSO.id)
+    )
+    return {name: [qso for _, qso in group] for name, group in groupby(rows, key=itemgetter(0))}
+
+
+# The QSO attributes scoring reads, as a plain tuple that pickles cheaply
+# for worker processes
+QsoRow = namedtuple("QsoRow", "id datetime_on park_ref mode tx_pwr call")
+
+
+def qso_rows_by_operator():
+    """{operator: [row tuple, ...]} for every QSO, in one query and without ORM objects."""
+    rows = db.session.execute(
+        select(
+            Operator.callsign, QSO.id, QSO.datetime_on, QSO.park_ref, QSO.mode, QSO.tx_pwr, QSO.call
+        )
+        .select_from(QSO)
+        .join(Log, QSO.log_id == Log.id)
+        .join(Operator, Log.operator_id == Operator.id)
+        .order_by(Operator.callsign, QSO.id)
+    )
+    return {
+        name: [tuple(row[1:]) for row in group] for name, group in groupby(rows, key=itemgetter(0))
+    }
+
+
+def _score_partition(partition):
+    """
+    Process-pool entry point: score [(operator, rows, bonuses), ...]
+    without database access. "qsos" in the results become ids.
+    """
+    results = []
+    for operator, rows, bonuses in partition:
+        context = ScoringContext({(operator, date): bonus for date, bonus in bonuses.items()})
+        result = score_qsos_for_operator(
+            [QsoRow(*row) for row in rows], operator_name=operator, context=context
+        )
+        for day in result["daily"].values():
+            day["qsos"] = [qso.id for qso in day["qsos"]]
+        results.append((operator, result))
+    return results
+
+
+def score_parallel(workers):
+    """
+    Score every operator with the Python engine across worker processes.
+    Operators are spread over `workers` partitions, largest first, and
+    the results are merged in operator order so the output does not
+    depend on the worker count or on which worker finishes first.
+    """
+    grouped = qso_rows_by_operator()
+    context = ScoringContext.load()
+
+    partitions = [[] for _ in range(max(1, workers))]
+    loads = [0] * len(partitions)
+    for operator in sorted(grouped, key=lambda op: (-len(grouped[op]), op)):
+        i = loads.index(min(loads))
+        partitions[i].append((operator, grouped[operator], context.bonuses_for(operator)))
+        loads[i] += len(grouped[operator])
+    partitions = [p for p in partitions if p]
+
+    if workers <= 1:
+        scored = [_score_partition(p) for p in partitions]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            scored = list(pool.map(_score_partition, partitions))
+
+    results = dict(pair for part in scored for pair in part)
+    return {operator: results[operator] for operator in sorted(results)}
+
+
+def qso_count(day):
+    """QSOs in a daily entry; the SQL engine counts them without listing them."""
+    return day["qso_count"] if "qso_count" in day else len(day["qsos"])
+
+
+def _store(operator, result, replace=True):
+    """Replace the materialized rows for operator with a scoring result."""
+    if replace:
+        DayParkScore.query.filter_by(operator=operator).delete()
+        OperatorScore.query.filter_by(operator=operator).delete()
+
+    summary = result["by_operator"]
+    db.session.add(OperatorScore(
+        operator=operator,
+        total_score=summary["total_score"],
+        total_qsos=summary["total_qsos"],
+        days=summary["days"],
+        parks=",".join(sorted(summary["parks"])),
+    ))
+    rows = [
+        {
+            "operator": operator,
+            "date": day["date"],
+            "park_code": day["park_code"],
+            "score": day["score"],
+            "qso_count": qso_count(day),
+            "is_new_park": day["is_new_park"],
+            "daily_multiplier": day["daily_multiplier"],
+            "daily_multiplier_reason": day["daily_multiplier_reason"],
+        }
+        for day in result["daily"].values()
+    ]
+    if rows:
+        # One executemany instead of a flush per ORM object
+        db.session.execute(insert(DayParkScore), rows)
+
+
+SCORING_ENGINES = ("python", "columnar", "sql")
+
+
+def scoring_engine(engine=None):
+    """The engine to use: engine if given, else the SCORING_ENGINE setting."""
+    engine = engine or app.config.get("SCORING_ENGINE", "python")
+    if engine not in SCORING_ENGINES:
+        raise ValueError(f"Unknown scoring engine: {engine}")
+    return engine
+
+
+def score_all(engine=None, operator=None, parallel=None):
+    """
+    Score every operator (or just operator) with the given engine.
+    Returns {operator: result}; operators without QSOs are absent.
+    parallel=N scores with the Python engine in N worker processes
+    (see score_parallel); the set-based engines ignore it.
+    """
+    engine = scoring_engine(engine)
+
+    if engine == "columnar":
+        from app.scoring_columnar import score_all_columnar
+        return score_all_columnar(operator)
+    if engine == "sql":
+        from app.scoring_sql import score_all_sql
+        return score_all_sql(operator)
+
+    if parallel and not operator:
+        return score_parallel(parallel)
+
+    if operator:
+        qsos = qsos_for_operator(operator)
+        grouped = {operator: qsos} if qsos else {}
+    else:
+        grouped = qsos_by_operator()
+    context = ScoringContext.load(operator)
+    return {
+        name: score_qsos_for_operator(qsos, operator_name=name, context=context)
+        for name, qsos in grouped.items()
+    }
+
+
+def recompute_operator(operator, engine=None):
+    """Rescore one operator from scratch and store it. Does not commit."""
+    operator = operator.upper()
+    result = score_all(engine, operator=operator).get(operator)
+    if result:
+        _store(operator, result)
+    else:
+        DayParkScore.query.filter_by(operator=operator).delete()
+        OperatorScore.query.filter_by(operator=operator).delete()
+    bump_data_version()
+    db.session.flush()
+
+
+def rescore_all(engine=None, parallel=None):
+    """
+    Rebuild every materialized score, optionally scoring in `parallel`
+    worker processes. Does not commit.
+    """
+    results = score_all(engine, parallel=parallel)
+    DayParkScore.query.delete()
+    OperatorScore.query.delete()
+    for operator, result in results.items():
+        _store(operator, result, replace=False)
+    bump_data_version()
+    db.session.flush()
+
+
+def ensure_standings():
+    """Build the standings once for databases that predate them."""
+    if OperatorScore.query.first() is None and QSO.query.first() is not None:
+        print("Building materialized standings...")
+        rescore_all()
+        db.session.commit()
+
+
+# -----------------------------
+# READS
+# -----------------------------
+def load_standings(limit=None, offset=0):
+    """Leaderboard rows, highest score first, optionally one page of them."""
+    query = OperatorScore.query.order_by(
+        OperatorScore.total_score.desc(), OperatorScore.operator
+    )
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return [standing_row(row) for row in query.all()]
+
+
+def standing_row(row):
+    """One leaderboard row (a dict) from an operator_scores row."""
+    return {
+        "operator": row.operator,
+        "total_score": score_value(row.total_score),
+        "total_qsos": row.total_qsos,
+        "days": row.days,
+        "parks": row.parks.split(",") if row.parks else [],
+    }
+
+
+def load_daily(operator=None):
+    """
+    {operator: {(date, park_code): day}} from day_park_scores, in the
+    order score_qsos_for_operator produced them.
+    """
+    query = DayParkScore.query
+    if operator:
+        query = query.filter_by(operator=operator)
+
+    daily = {}
+    for row in query.order_by(DayParkScore.id):
+        daily.setdefault(row.operator, {})[(row.date, row.park_code)] = {
+            "score": score_value(row.score),
+            "qso_count": row.qso_count,
+            "park_code": row.park_code,
+            "date": row.date,
+            "is_new_park": row.is_new_park,
+            "daily_multiplier": row.daily_multiplier,
+            "daily_multiplier_reason": row.daily_multiplier_reason,
+        }
+    return daily
+
+
+# -----------------------------
+# VERIFY
+# -----------------------------
+def verify_standings(engine=None):
+    """
+    Compare the materialized standings with a full recomputation.
+    Returns a list of human-readable mismatches (empty when they agree).
+    """
+    stored = {row["operator"]: row for row in load_standings()}
+    stored_daily = load_daily()
+    problems = []
+
+    expected = score_all(engine)
+
+    for operator in sorted(stored.keys() - expected.keys()):
+        problems.append(f"{operator}: materialized but has no QSOs")
+
+    for operator, result in sorted(expected.items()):
+        row = stored.get(operator)
+        if row is None:
+            problems.append(f"{operator}: missing from operator_scores")
+            continue
+
+        summary = result["by_operator"]
+        want = (summary["total_score"], summary["total_qsos"], summary["days"], sorted(summary["parks"]))
+        have = (row["total_score"], row["total_qsos"], row["days"], row["parks"])
+        if want != have:
+            problems.append(f"{operator}: expected {want}, materialized {have}")
+
+        want_days = {
+            key: (day["score"], qso_count(day), day["is_new_park"], day["daily_multiplier"])
+            for key, day in result["daily"].items()
+        }
+        have_days = {
+            key: (day["score"], day["qso_count"], day["is_new_park"], day["daily_multiplier"])
+            for key, day in stored_daily.get(operator, {}).items()
+        }
+        if want_days != have_days:
+            problems.append(f"{operator}: daily breakdown differs")
+
+    return problems
+
+
+def compare_results(expected, actual):
+    """
+    Compare {operator: result} maps from two engines, day by day and,
+    where both engines list them, QSO by QSO ("qsos" are compared by id).
+    Returns a list of human-readable mismatches.
+    """
+    problems = []
+
+    for operator in sorted(expected.keys() ^ actual.keys()):
+        problems.append(f"{operator}: only scored by one engine")
+
+    for operator in sorted(expected.keys() & actual.keys()):
+        want, have = expected[operator], actual[operator]
+
+        if want["by_operator"] != have["by_operator"]:
+            problems.append(f"{operator}: totals {want['by_operator']} != {have['by_operator']}")
+
+        if list(want["daily"]) != list(have["daily"]):
+            problems.append(f"{operator}: day/park groups differ or are out of order")
+            continue
+
+        for key, want_day in want["daily"].items():
+            have_day = have["daily"][key]
+            fields = ["score", "is_new_park", "daily_multiplier", "daily_multiplier_reason"]
+            if "qso_scores" in want_day and "qso_scores" in have_day:
+                fields.append("qso_scores")
+            for field in fields:
+                if want_day[field] != have_day[field]:
+                    problems.append(f"{operator} {key}: {field} {want_day[field]!r} != {have_day[field]!r}")
+
+            if "qsos" in want_day and "qsos" in have_day:
+                want_ids = [getattr(q, "id", q) for q in want_day["qsos"]]
+                have_ids = [getattr(q, "id", q) for q in have_day["qsos"]]
+                if want_ids != have_ids:
+                    problems.append(f"{operator} {key}: QSO lists differ")
+            elif qso_count(want_day) != qso_count(have_day):
+                problems.append(f"{operator} {key}: QSO counts differ")
+
+    return problems
@@ -0,0 +1,35 @@
+// Background job progress: polls every .job-status element's
+// data-job-url (/admin/jobs/<id>) and reloads the page once it is done.
+(function () {
+    function label(job) {
+        return job.kind === "rescore" ? "Rescore" : "Import";
+    }
+
+    function pollJob(el) {
+        fetch(el.dataset.jobUrl)
+            .then(r => r.json())
+            .then(job => {
+                if (job.status === "done") {
+                    window.location.reload();
+                    return;
+                }
+                if (job.status === "failed") {
+                    el.style.color = "red";
+                    el.textContent = label(job) + " failed: " + job.error;
+                    return;
+                }
+                if (job.kind === "rescore") {
+                    el.textContent = "Rescore " + job.status + " (" + job.elapsed + "s)";
+                } else {
+                    el.textContent = "Import " + job.status + ": "
+                        + job.records_parsed + " parsed, "
+                        + job.records_inserted + " inserted, "
+                        + job.records_skipped + " duplicates skipped ("
+                        + job.elapsed + "s)";
+                }
+                setTimeout(() => pollJob(el), 1000);
+            });
+    }
+
+    document.querySelectorAll(".job-status").forEach(pollJob);
+})();
@@ -0,0 +1,69 @@
+// Live leaderboard: patches the /leaders table in place from the
+// /leaders/stream Server-Sent Events feed instead of reloading the page.
+(function () {
+    const tbody = document.getElementById("leaderboard-rows");
+    if (!tbody || !window.EventSource) {
+        return;
+    }
+
+    function cells(row) {
+        return [
+            row.rank,
+            row.operator,
+            row.total_score,
+            row.parks.length ? row.parks.join(", ") : "—",
+        ];
+    }
+
+    function render(tr, row) {
+        tr.dataset.operator = row.operator;
+        tr.dataset.rank = row.rank;
+        tr.replaceChildren(...cells(row).map((value, i) => {
+            const td = document.createElement("td");
+            if (i === 0) {
+                const strong = document.createElement("strong");
+                strong.textContent = value;
+                td.append(strong);
+            } else {
+                td.textContent = value;
+            }
+            return td;
+        }));
+    }
+
+    function findRow(operator) {
+        return Array.from(tbody.rows).find(tr => tr.dataset.operator === operator);
+    }
+
+    function apply(update, reset) {
+        const seen = new Set();
+        update.rows.forEach(row => {
+            let tr = findRow(row.operator);
+            if (!tr) {
+                tr = document.createElement("tr");
+                tbody.append(tr);
+            }
+            render(tr, row);
+            seen.add(row.operator);
+        });
+
+        // A reset lists every row, so anything else has left the standings
+        Array.from(tbody.rows).forEach(tr => {
+            if (update.removed.includes(tr.dataset.operator) || (reset && !seen.has(tr.dataset.operator))) {
+                tr.remove();
+            }
+        });
+
+        // Rows without a rank from the stream keep their rendered position
+        Array.from(tbody.rows)
+            .map((tr, i) => [Number(tr.dataset.rank || i + 1), tr])
+            .sort((a, b) => a[0] - b[0])
+            .forEach(([, tr]) => tbody.append(tr));
+
+        tbody.dataset.version = update.version;
+    }
+
+    const source = new EventSource(`${tbody.dataset.streamUrl}?since=${tbody.dataset.version}`);
+    source.addEventListener("reset", e => apply(JSON.parse(e.data), true));
+    source.addEventListener("delta", e => apply(JSON.parse(e.data), false));
+})();
@@ -0,0 +1,59 @@
+"""
+Scoring and import trace.
+
+Per-QSO detail goes to the "parkmas.scoring" and "parkmas.import"
+loggers at DEBUG with lazy %-formatting. Nothing is emitted unless the
+level is enabled (LOG_LEVEL=DEBUG, or an admin capture below), and hot
+loops check trace_enabled() once up front so a disabled trace costs
+nothing per QSO.
+"""
+
+import io
+import logging
+import threading
+from contextlib import contextmanager
+
+scoring_log = logging.getLogger("parkmas.scoring")
+import_log = logging.getLogger("parkmas.import")
+
+_capture_lock = threading.Lock()
+_captures = 0
+_saved_level = logging.NOTSET
+
+
+def trace_enabled(logger=scoring_log):
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+@contextmanager
+def capture_trace():
+    """
+    Collect the scoring trace from this thread into an in-memory
+    buffer, e.g. to show one operator's scoring breakdown on a page:
+
+        with capture_trace() as buffer:
+            score_qsos_for_operator(qsos, operator_name=op)
+        text = buffer.getvalue()
+    """
+    global _captures, _saved_level
+
+    buffer = io.StringIO()
+    handler = logging.StreamHandler(buffer)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    thread = threading.get_ident()
+    handler.addFilter(lambda record: record.thread == thread)
+
+    with _capture_lock:
+        if _captures == 0:
+            _saved_level = scoring_log.level
+        _captures += 1
+        scoring_log.setLevel(logging.DEBUG)
+        scoring_log.addHandler(handler)
+    try:
+        yield buffer
+    finally:
+        with _capture_lock:
+            scoring_log.removeHandler(handler)
+            _captures -= 1
+            if _captures == 0:
+                scoring_log.setLevel(_saved_level)
@@ -0,0 +1,92 @@
+"""
+Index of uploaded ADIF files.
+
+Every file in instance/uploads has a row in the uploads table holding
+its size, mtime, sha256, QSO count and review status. The row is written
+when the file is saved or edited, so listing pages are a single query
+instead of a directory scan plus a full parse of every file.
+"""
+
+import os
+
+from flask import current_app as app
+
+from app import db
+from app.adif import ALLOWED_EXTENSIONS, count_records
+from app.importer import file_sha256
+from app.models import Log, Upload
+
+
+def upload_dir():
+    path = os.path.join(app.instance_path, "uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def index_upload(filename, sha256=None, status="pending"):
+    """
+    Create or refresh the uploads row for instance/uploads/<filename>
+    from the file on disk. Does not commit.
+    """
+    full_path = os.path.join(upload_dir(), filename)
+
+    upload = Upload.query.filter_by(filename=filename).first()
+    if not upload:
+        upload = Upload(filename=filename, status=status)
+        db.session.add(upload)
+
+    try:
+        qso_count = count_records(full_path)
+    except (UnicodeDecodeError, OSError):
+        qso_count = 0
+
+    upload.sha256 = sha256 or file_sha256(full_path)
+    upload.size = os.path.getsize(full_path)
+    upload.uploaded_at = os.path.getmtime(full_path)
+    upload.qso_count = qso_count
+    return upload
+
+
+def find_upload(sha256):
+    """Return the upload (pending or imported) with this content hash, if any."""
+    return Upload.query.filter_by(sha256=sha256).first()
+
+
+def sync_upload_index():
+    """
+    Add rows for files in instance/uploads that are not indexed yet
+    (e.g. copied in by hand) and drop rows whose file is gone. Files
+    with the same content as an already-indexed one are left unindexed.
+    Returns (added, removed). Does not commit.
+    """
+    directory = upload_dir()
+    on_disk = {
+        name for name in os.listdir(directory)
+        if name.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS
+        and os.path.isfile(os.path.join(directory, name))
+    }
+    indexed = {upload.filename: upload for upload in Upload.query.all()}
+    hashes = {upload.sha256 for upload in indexed.values()}
+    # Only the columns needed, so this also works from early migrations
+    logs = db.session.query(Log.id, Log.sha256, Log.filename).all()
+    logs_by_hash = {log.sha256: log for log in logs if log.sha256}
+    logs_by_name = {log.filename: log for log in logs}
+
+    added = 0
+    for filename in sorted(on_disk - indexed.keys()):
+        sha256 = file_sha256(os.path.join(directory, filename))
+        if sha256 in hashes:
+            continue
+        hashes.add(sha256)
+
+        log = logs_by_hash.get(sha256) or logs_by_name.get(filename)
+        upload = index_upload(filename, sha256=sha256, status="imported" if log else "pending")
+        upload.log_id = log.id if log else None
+        added += 1
+
+    removed = 0
+    for filename in indexed.keys() - on_disk:
+        db.session.delete(indexed[filename])
+        removed += 1
+
+    return added, removed
@@ -0,0 +1,4 @@
+"""
+Parkmas benchmarks. Run each module with `python -m benchmarks.<name>`
+from the repository root; they use the app's instance database.
+"""
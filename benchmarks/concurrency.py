@@ -0,0 +1,195 @@
+"""
+Readers against a bulk import, with and without the SQLite pragmas.
+
+    python -m benchmarks.concurrency [--readers 4] [--operators 200] [--qsos 40]
+                                     [--import-qsos 20000] [--pause 0]
+
+Runs twice: once with SQLite's own defaults (rollback journal,
+synchronous=FULL, 2 MB cache, no mmap; how the app ran before
+app/pragmas.py) and once with the SQLITE_* settings from the
+environment. Each run builds a scratch instance with a seeded contest
+and imports one large log on its own, then starts --readers processes
+(standing in for gunicorn workers) that render the standings in a loop
+(current_version() + load_standings(), what /leaders does on a cache
+miss) and imports a second log of the same size while they run.
+
+Reports both import times, and for the reads that finished while the
+second import's transaction was open: how many, their latency (max is
+the longest a reader was stalled) and how many failed with "database
+is locked". The import time with readers depends on the cores
+available: readers that are not blocked compete with the import for
+CPU. By default they read back to back; --pause (ms between reads)
+gives a load closer to real page views.
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("IMPORT_WORKER", "0")
+
+from app import create_app  # noqa: E402
+from benchmarks.generate import generate_contest, generate_log  # noqa: E402
+
+# SQLite's built-in settings (busy_timeout matches Python's default
+# sqlite3 timeout)
+SQLITE_DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "DELETE",
+    "SQLITE_BUSY_TIMEOUT": "5000",
+    "SQLITE_SYNCHRONOUS": "FULL",
+    "SQLITE_CACHE_SIZE": "-2000",
+    "SQLITE_MMAP_SIZE": "0",
+}
+
+
+def reader(instance, pause, ready, stop, results):
+    """Render the standings until stop is set; send back (started_at, finished_at) per read."""
+    import contextlib
+    import io
+
+    from sqlalchemy.exc import OperationalError
+
+    from app.cache import current_version
+    from app.standings import load_standings
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = create_app(instance_path=instance)
+
+    reads = []
+    locked = 0
+    ready.set()
+    while not stop.is_set():
+        start = time.time()
+        try:
+            with app.app_context():
+                current_version()
+                load_standings()
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+            continue
+        reads.append((start, time.time()))
+        stop.wait(pause)
+    results.put((reads, locked))
+
+
+def run_profile(name, settings, args, logs, solo_log, bulk_log):
+    """Import solo_log alone, then bulk_log with readers running, under the given SQLITE_* settings."""
+    from app.importer import import_adif_file
+
+    # Readers are spawned, so they pick the settings up from os.environ too
+    for key, value in settings.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+    scratch = tempfile.mkdtemp(prefix=f"parkmas-concurrency-{name}-")
+    instance = os.path.join(scratch, "instance")
+    try:
+        app = create_app(instance_path=instance)
+        uploads = os.path.join(instance, "uploads")
+        os.makedirs(uploads, exist_ok=True)
+        with app.app_context():
+            for path in logs + [solo_log, bulk_log]:
+                shutil.copy(path, uploads)
+            for path in logs:
+                import_adif_file(os.path.join(uploads, os.path.basename(path)), os.path.basename(path))
+
+            filename = os.path.basename(solo_log)
+            start = time.perf_counter()
+            import_adif_file(os.path.join(uploads, filename), filename)
+            alone_s = time.perf_counter() - start
+
+        # Spawned like the rescore pool, so each reader has its own connections
+        context = multiprocessing.get_context("spawn")
+        stop = context.Event()
+        results = context.Queue()
+        readiness = [context.Event() for _ in range(args.readers)]
+        processes = [
+            context.Process(target=reader, args=(instance, args.pause / 1000, ready, stop, results))
+            for ready in readiness
+        ]
+        for process in processes:
+            process.start()
+        for ready in readiness:
+            ready.wait()
+        time.sleep(0.5)
+
+        filename = os.path.basename(bulk_log)
+        with app.app_context():
+            import_start = time.time()
+            imported = import_adif_file(os.path.join(uploads, filename), filename)
+            import_end = time.time()
+
+        time.sleep(0.5)
+        stop.set()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    # Reads that overlapped the import, including ones it held up
+    during = [finished - started for reads, _ in outcomes for started, finished in reads
+              if started < import_end and finished > import_start]
+    duration = import_end - import_start
+    return {
+        "profile": name,
+        "journal_mode": app.config["SQLITE_PRAGMAS"]["journal_mode"],
+        "imported": imported,
+        "alone_s": alone_s,
+        "import_s": duration,
+        "reads": len(during),
+        "reads_per_s": len(during) / duration,
+        "p50_ms": statistics.median(during) * 1000 if during else None,
+        "max_ms": max(during) * 1000 if during else None,
+        "locked": sum(locked for _, locked in outcomes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4, help="reader processes")
+    parser.add_argument("--operators", type=int, default=200, help="operators already in the contest")
+    parser.add_argument("--qsos", type=int, default=40, help="QSOs per operator")
+    parser.add_argument("--import-qsos", type=int, default=20000, help="QSOs in the imported log")
+    parser.add_argument("--pause", type=float, default=0, help="ms each reader waits between reads")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    data = tempfile.mkdtemp(prefix="parkmas-concurrency-logs-")
+    try:
+        print(f"Generating {args.operators} logs x {args.qsos} QSOs and a {args.import_qsos}-QSO log...")
+        logs = generate_contest(data, args.operators, args.qsos, args.seed)
+        solo_log = os.path.join(data, "N0SOLO.adi")
+        generate_log(solo_log, "N0SOLO", args.import_qsos, args.seed + 1)
+        bulk_log = os.path.join(data, "N0BULK.adi")
+        generate_log(bulk_log, "N0BULK", args.import_qsos, args.seed)
+
+        configured = {key: os.environ.get(key) for key in SQLITE_DEFAULTS}
+        rows = []
+        for name, settings in [("defaults", SQLITE_DEFAULTS), ("configured", configured)]:
+            print(f"{name}...")
+            rows.append(run_profile(name, settings, args, logs, solo_log, bulk_log))
+    finally:
+        shutil.rmtree(data, ignore_errors=True)
+
+    def ms(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    print(f"\n{'profile':<11} {'journal':<7} {'alone s':>7} {'import s':>8} {'reads':>6} {'reads/s':>8} "
+          f"{'p50 ms':>7} {'max ms':>8} {'locked':>6}")
+    for row in rows:
+        print(f"{row['profile']:<11} {row['journal_mode']:<7} {row['alone_s']:>7.2f} {row['import_s']:>8.2f} "
+              f"{row['reads']:>6} {row['reads_per_s']:>8.1f} "
+              f"{ms(row['p50_ms']):>7} {ms(row['max_ms']):>8} {row['locked']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Seeded synthetic contest data.
+
+    python -m benchmarks.generate OUT_DIR [--operators 500] [--qsos 40] [--seed 1]
+
+Writes one ADIF log per operator, shaped like real Park-mas uploads:
+POTA activations in MY_SIG_INFO over a 12-day window, a handful of
+home parks per operator with the odd new one, mostly SSB/CW with some
+digital contacts that do not score, and a mix of QRP and full-power
+TX_PWR values. The same seed always produces the same files.
+"""
+
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+from app.adif import write_record
+
+START_DATE = date(2025, 7, 12)  # the contest window (July 12–24) on the leaderboard
+DAYS = 12
+
+MODES = ["SSB"] * 5 + ["CW"] * 3 + ["FT8", "FT4"]
+BANDS = {"20M": 14.250, "40M": 7.200, "17M": 18.130, "15M": 21.300, "10M": 28.400}
+POWERS = ["5", "5W", "4.5", "10", "50", "100", "100W"]
+STATES = ["CO", "WY", "NE", "KS", "UT", "NM", "TX", "CA", "NY", "FL"]
+PREFIXES = ["K", "W", "N", "KD", "KC", "WB", "AA", "KE"]
+
+
+def callsign(rnd):
+    suffix = "".join(rnd.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ", k=rnd.randint(2, 3)))
+    return f"{rnd.choice(PREFIXES)}{rnd.randint(0, 9)}{suffix}"
+
+
+def park_ref(rnd):
+    return f"US-{rnd.randint(1, 12000):04d}"
+
+
+def generate_log(path, operator, qsos, seed):
+    """Write one operator's log of `qsos` contacts to path."""
+    rnd = random.Random(seed)
+    home_parks = [park_ref(rnd) for _ in range(rnd.randint(1, 4))]
+    qrp_operator = rnd.random() < 0.3
+    active_days = sorted(rnd.sample(range(DAYS), rnd.randint(3, DAYS)))
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Synthetic Park-mas log for {operator}\n<ADIF_VER:5>3.1.4 <PROGRAMID:14>parkmas-bench <EOH>\n")
+
+        for i in range(qsos):
+            day = START_DATE + timedelta(days=rnd.choice(active_days))
+            on = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=rnd.randint(12, 23), minutes=rnd.randint(0, 59), seconds=rnd.randint(0, 59)
+            )
+            # Most activations are from a home park; now and then a new one
+            park = rnd.choice(home_parks) if rnd.random() < 0.9 else park_ref(rnd)
+            band = rnd.choice(list(BANDS))
+            power = rnd.choice(POWERS[:3]) if qrp_operator else rnd.choice(POWERS)
+
+            record = {
+                "call": callsign(rnd),
+                "band": band,
+                "freq": f"{BANDS[band] + rnd.randint(0, 40) / 1000:.3f}",
+                "mode": rnd.choice(MODES),
+                "qso_date": on.strftime("%Y%m%d"),
+                "time_on": on.strftime("%H%M%S"),
+                "rst_sent": "59",
+                "rst_rcvd": rnd.choice(["59", "57", "55", "44"]),
+                "state": rnd.choice(STATES),
+                "station_callsign": operator,
+                "operator": operator,
+                "my_sig": "POTA",
+                "my_sig_info": park,
+                "tx_pwr": power,
+            }
+            if i % 25 == 0:
+                record["comment"] = "P2P"
+            write_record(f, record)
+
+
+def generate_contest(directory, operators=500, qsos=40, seed=1):
+    """
+    Write `operators` logs of `qsos` contacts each into directory and
+    return their paths. Operator callsigns and contents depend only on seed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rnd = random.Random(seed)
+
+    paths = []
+    used = set()
+    for n in range(operators):
+        operator = callsign(rnd)
+        while operator in used:
+            operator = callsign(rnd)
+        used.add(operator)
+
+        path = os.path.join(directory, f"{operator}-{n:04d}.adi")
+        generate_log(path, operator, qsos, seed * 100003 + n)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write seeded synthetic Park-mas ADIF logs.")
+    parser.add_argument("directory")
+    parser.add_argument("--operators", type=int, default=500)
+    parser.add_argument("--qsos", type=int, default=40, help="QSOs per operator")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = generate_contest(args.directory, args.operators, args.qsos, args.seed)
+    print(f"Wrote {len(paths)} logs ({len(paths) * args.qsos} QSOs) to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Full-rescore speed with rescore_all(parallel=N).
+
+    python -m benchmarks.rescore_parallel [--workers 1,2,4,8] [--repeat 3]
+
+Times score_all(parallel=N) against the instance database for each
+worker count (scoring only, nothing is written) and checks that every
+run produced the same result as the single-process run.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("IMPORT_WORKER", "0")
+
+from app import create_app  # noqa: E402
+from app.standings import compare_results, score_all  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per worker count (best is reported)")
+    args = parser.parse_args()
+    counts = [int(n) for n in args.workers.split(",")]
+
+    app = create_app()
+    with app.app_context():
+        baseline = None
+        print(f"{'workers':>7}  {'best s':>8}  {'speedup':>7}  operators")
+        for workers in counts:
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = score_all("python", parallel=workers)
+                times.append(time.perf_counter() - start)
+
+            if baseline is None:
+                baseline = (min(times), results)
+            problems = compare_results(baseline[1], results)
+            if problems:
+                raise SystemExit(f"{workers} workers: results differ: {problems[:3]}")
+
+            print(f"{workers:>7}  {min(times):>8.3f}  {baseline[0] / min(times):>6.2f}x  {len(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Scoring/import benchmark suite.
+
+    python -m benchmarks.run [--operators 500] [--qsos 40] [--seed 1]
+                             [--output FILE] [--compare PREVIOUS.json]
+
+Generates a seeded contest (see benchmarks.generate) into a scratch
+instance folder, then times:
+
+  import        import_adif_file for every log
+  score         score_qsos_for_operator for every operator
+  score_<eng>   the columnar and SQL engines on the same data
+  leaders       GET /leaders through the test client: cold, from the
+                page cache and from the static snapshot
+  edit_upload   GET /admin/uploads/edit/<file> for a large log
+
+Results (with the git commit, parameters and environment) are written
+as JSON to benchmarks/results/<timestamp>.json so runs can be compared
+over time; --compare prints the change against an earlier file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("IMPORT_WORKER", "0")
+
+from app import create_app  # noqa: E402
+from benchmarks.generate import generate_contest, generate_log  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def timed(fn, repeat=1):
+    """Run fn repeat times; return (timings dict, last result)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "mean": sum(runs) / len(runs), "runs": len(runs)}, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["authenticated"] = True
+        session["user_is_admin"] = True
+        session["user"] = "BENCH"
+    return client
+
+
+# -----------------------------
+# SCENARIOS
+# -----------------------------
+def bench_import(app, paths):
+    from app.importer import import_adif_file
+
+    upload_dir = os.path.join(app.instance_path, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+
+    def run():
+        total = 0
+        for path in paths:
+            filename = os.path.basename(path)
+            target = os.path.join(upload_dir, filename)
+            shutil.copy(path, target)
+            total += import_adif_file(target, filename)
+        return total
+
+    with app.app_context():
+        timing, qsos = timed(run)
+    timing["qsos"] = qsos
+    timing["qsos_per_s"] = qsos / timing["best"]
+    return timing
+
+
+def bench_score(app, engine, repeat):
+    from app.standings import score_all
+
+    with app.app_context():
+        timing, results = timed(lambda: score_all(engine), repeat)
+    timing["operators"] = len(results)
+    return timing
+
+
+def bench_leaders(app, repeat):
+    from app import cache, db
+    from app.snapshot import snapshot_dir, write_snapshot
+    from app.standings import rescore_all
+
+    client = app.test_client()
+    with app.app_context():
+        rescore_all("python")
+        db.session.commit()
+
+        def cold():
+            cache.clear()
+            shutil.rmtree(snapshot_dir())
+            return client.get("/leaders")
+
+        # Live render, then the shared page cache, then the static snapshot
+        cold_timing, response = timed(cold, repeat)
+        warm_timing, _ = timed(lambda: client.get("/leaders"), repeat * 10)
+        write_snapshot(app)
+        snapshot_timing, _ = timed(lambda: client.get("/leaders"), repeat * 10)
+
+    return {
+        "status": response.status_code,
+        "cold": cold_timing,
+        "cached": warm_timing,
+        "snapshot": snapshot_timing,
+    }
+
+
+def bench_edit_upload(app, qsos, seed, repeat):
+    filename = "BENCH-EDIT.adi"
+    path = os.path.join(app.instance_path, "uploads", filename)
+    generate_log(path, "N0EDIT", qsos, seed)
+
+    client = admin_client(app)
+    timing, response = timed(lambda: client.get(f"/admin/uploads/edit/{filename}"), repeat)
+    timing["status"] = response.status_code
+    timing["qsos"] = qsos
+    return timing
+
+
+# -----------------------------
+# REPORTING
+# -----------------------------
+def flatten(results, prefix=""):
+    """{"leaders.cold": 0.12, ...}: the best time of every timing in results."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if "best" in value:
+                flat[prefix + key] = value["best"]
+            flat.update(flatten(value, f"{prefix}{key}."))
+    return flat
+
+
+def compare(previous_path, scenarios):
+    with open(previous_path) as f:
+        previous = flatten(json.load(f)["scenarios"])
+    current = flatten(scenarios)
+
+    print(f"\nChange against {previous_path}:")
+    for key in sorted(current.keys() & previous.keys()):
+        ratio = current[key] / previous[key] if previous[key] else float("nan")
+        print(f"  {key:<28} {previous[key]:>9.4f}s -> {current[key]:>9.4f}s  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Park-mas scoring/import benchmarks.")
+    parser.add_argument("--operators", type=int, default=500)
+    parser.add_argument("--qsos", type=int, default=40, help="QSOs per operator")
+    parser.add_argument("--edit-qsos", type=int, default=2000, help="QSOs in the edit_upload log")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch instance folder")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="parkmas-bench-")
+    instance = os.path.join(scratch, "instance")
+    try:
+        print(f"Generating {args.operators} logs x {args.qsos} QSOs (seed {args.seed})...")
+        paths = generate_contest(os.path.join(scratch, "logs"), args.operators, args.qsos, args.seed)
+
+        app = create_app(instance_path=instance)
+        scenarios = {}
+
+        print("import...")
+        scenarios["import"] = bench_import(app, paths)
+        print("score...")
+        scenarios["score"] = bench_score(app, "python", args.repeat)
+        for engine in ("columnar", "sql"):
+            try:
+                scenarios[f"score_{engine}"] = bench_score(app, engine, args.repeat)
+            except RuntimeError as e:  # e.g. numpy not installed
+                print(f"  skipped {engine}: {e}")
+        print("leaders...")
+        scenarios["leaders"] = bench_leaders(app, args.repeat)
+        print("edit_upload...")
+        scenarios["edit_upload"] = bench_edit_upload(app, args.edit_qsos, args.seed, args.repeat)
+    finally:
+        if args.keep:
+            print(f"Kept {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    now = datetime.now(timezone.utc)
+    report = {
+        "timestamp": now.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "params": {
+            "operators": args.operators, "qsos": args.qsos, "edit_qsos": args.edit_qsos,
+            "seed": args.seed, "repeat": args.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "scenarios": scenarios,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, now.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    for key, best in flatten(scenarios).items():
+        print(f"  {key:<28} {best:>9.4f}s")
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(args.compare, scenarios)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Remote SSO token validation against a local stand-in for the central
+auth service.
+
+    python -m benchmarks.sso_validation [--tokens 20] [--rounds 5] [--delay 0.05]
+
+Starts a stub /sso/validate server on localhost and points
+app.client_auth at it, then shows:
+
+  pooling   requests vs. TCP connections for the first round of tokens
+  cache     later rounds of the same tokens, answered without a request
+  breaker   a slow central service tripping the circuit breaker, calls
+            falling back to validate_token_local, and the trial call
+            that closes it again once the service recovers
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+
+from app import client_auth
+
+
+class StubAuth(BaseHTTPRequestHandler):
+    """Answers /sso/validate by checking the token with the shared secret."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    delay = 0.0
+    connections = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubAuth.lock:
+            StubAuth.connections += 1
+
+    def do_POST(self):
+        with StubAuth.lock:
+            StubAuth.requests += 1
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(StubAuth.delay)
+
+        payload = client_auth.validate_token_local(body["token"])
+        data = json.dumps({"valid": True, **payload} if payload else {"valid": False}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_token(user_id, ttl=3600):
+    now = int(time.time())
+    return jwt.encode(
+        {
+            "user_id": user_id, "callsign": f"K0T{user_id}", "app_code": client_auth.APP_CODE,
+            "iss": "k0iro_auth", "iat": now, "exp": now + ttl, "permissions": {},
+        },
+        client_auth.APP_SECRET, algorithm="HS256",
+    )
+
+
+def timed_round(tokens):
+    start = time.perf_counter()
+    valid = sum(1 for token in tokens if client_auth.validate_token_remote(token))
+    return valid, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20, help="distinct users logging in")
+    parser.add_argument("--rounds", type=int, default=5, help="times each token is validated")
+    parser.add_argument("--delay", type=float, default=0.05, help="stub response time (s)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAuth)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client_auth.CENTRAL_AUTH_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    client_auth.token_cache.clear()
+    client_auth.breaker.reset()
+    StubAuth.delay = args.delay
+
+    tokens = [make_token(i) for i in range(args.tokens)]
+    try:
+        valid, elapsed = timed_round(tokens)
+        print(f"pooling: {valid}/{len(tokens)} valid in {elapsed:.3f}s, "
+              f"{StubAuth.requests} requests over {StubAuth.connections} connection(s)")
+
+        before = StubAuth.requests
+        for _ in range(args.rounds - 1):
+            valid, elapsed = timed_round(tokens)
+        print(f"cache:   last round {valid}/{len(tokens)} valid in {elapsed:.4f}s, "
+              f"{StubAuth.requests - before} requests for {args.rounds - 1} more rounds")
+
+        # New tokens against a central service slower than SLOW_SECONDS
+        client_auth.breaker.reset_after = 1.0
+        StubAuth.delay = client_auth.SLOW_SECONDS + 0.2
+        slow = [make_token(1000 + i) for i in range(client_auth.BREAKER_FAILURES + 5)]
+        before = StubAuth.requests
+        valid, elapsed = timed_round(slow)
+        print(f"breaker: {valid}/{len(slow)} valid in {elapsed:.2f}s with a slow service; "
+              f"{StubAuth.requests - before} remote calls before it opened "
+              f"(open: {client_auth.breaker.is_open})")
+
+        StubAuth.delay = args.delay
+        time.sleep(client_auth.breaker.reset_after)
+        timed_round([make_token(2000)])
+        print(f"         after {client_auth.breaker.reset_after:.0f}s the trial call succeeded "
+              f"(open: {client_auth.breaker.is_open})")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
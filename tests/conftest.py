@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+os.environ["IMPORT_WORKER"] = "0"
+
+from app import create_app  # noqa: E402
+from app.adif import write_record  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(instance_path=str(tmp_path / "instance"))
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def admin(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["authenticated"] = True
+        session["user_is_admin"] = True
+        session["user"] = "ADMIN"
+    return client
+
+
+def qso(call, when, park="US-0001", mode="SSB", tx_pwr="100", **extra):
+    """One ADIF record; when is "YYYYMMDD HHMMSS"."""
+    qso_date, time_on = when.split()
+    return {
+        "call": call, "band": "20M", "mode": mode, "qso_date": qso_date, "time_on": time_on,
+        "my_sig": "POTA", "my_sig_info": park, "tx_pwr": tx_pwr, **extra,
+    }
+
+
+def write_adif(path, operator, records):
+    """Write a log for operator (station callsign and OPERATOR) to path."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Test log\n<ADIF_VER:5>3.1.4 <EOH>\n")
+        for record in records:
+            write_record(f, {"station_callsign": operator, "operator": operator, **record})
+    return path
+
+
+def run_jobs(app):
+    """Run every queued job in this process, as the background worker would."""
+    from app.jobs import claim_next_job, run_job
+
+    with app.app_context():
+        while (job := claim_next_job()) is not None:
+            run_job(app, job)
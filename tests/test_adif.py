@@ -0,0 +1,22 @@
+import io
+
+import pytest
+
+from app.adif import ADIFReader
+
+RECORDS = "<CALL:4>K1AB<BAND:3>20M<EOR>\n<CALL:4>W2CD<BAND:3>40M<EOR>\n"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("<ADIF_VER:5>3.1.0<PROGRAMID:4>test<EOH>\n", "<ADIF_VER:5>3.1.0<PROGRAMID:4>test"),
+    ("Exported log\n<ADIF_VER:5>3.1.0 <EOH>\n", "Exported log\n<ADIF_VER:5>3.1.0"),
+    ("", None),
+])
+def test_header_is_not_part_of_first_record(header, expected):
+    # A small chunk size makes the header span several refills
+    reader = ADIFReader(io.StringIO(header + RECORDS), chunk_size=8)
+    records = list(reader)
+
+    assert records == [{"call": "K1AB", "band": "20M"}, {"call": "W2CD", "band": "40M"}]
+    assert reader.header == expected
+    assert ADIFReader(io.StringIO(header + RECORDS), chunk_size=8).count() == 2
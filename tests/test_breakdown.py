@@ -0,0 +1,29 @@
+import sqlite3
+
+from tests.conftest import qso, run_jobs, write_adif
+from tests.test_reset import upload
+
+
+def cached_keys(app):
+    conn = sqlite3.connect(f"{app.instance_path}/cache.db")
+    try:
+        return {key for key, in conn.execute("SELECT key FROM page_cache WHERE key LIKE 'breakdown:%'")}
+    finally:
+        conn.close()
+
+
+def test_breakdown_cache_keys_are_bounded(app, admin, tmp_path):
+    records = [qso("W1AW", f"202507{day:02d} 150000") for day in range(1, 6)]
+    upload(admin, write_adif(tmp_path / "a.adi", "K0ABC", records), "a.adi")
+    admin.post("/admin/uploads/accept/a.adi")
+    run_jobs(app)
+
+    for limit in (1, 2, 7, 25):
+        page = admin.get(f"/admin/scoring/K0ABC/breakdown?limit={limit}").get_json()
+        assert page["limit"] == 25
+        assert page["total"] == 5
+    page = admin.get("/admin/scoring/K0ABC/breakdown?offset=3").get_json()
+    assert [day["date"] for day in page["days"]] == ["2025-07-04", "2025-07-05"]
+
+    # offset=3 is not a whole page of 100, so it was not cached
+    assert cached_keys(app) == {"breakdown:K0ABC:0:25"}
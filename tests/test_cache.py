@@ -0,0 +1,25 @@
+import threading
+
+from app import cache
+
+
+def test_connection_is_reused_per_thread(app):
+    with app.app_context():
+        cache.put("page", 3, "<p>hi</p>")
+        assert cache.get("page", 3) == b"<p>hi</p>"
+        assert cache.get("page", 2) is None
+        assert cache._connect() is cache._connect()
+        mine = cache._connect()
+
+    other = []
+
+    def read_in_thread():
+        with app.app_context():
+            other.append(cache._connect())
+            other.append(cache.get("page", 3))
+
+    thread = threading.Thread(target=read_in_thread)
+    thread.start()
+    thread.join()
+    assert other[0] is not mine
+    assert other[1] == b"<p>hi</p>"
@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+
+from app import client_auth
+
+
+def make_token(user_id):
+    now = int(time.time())
+    return jwt.encode(
+        {"user_id": user_id, "callsign": f"K0T{user_id}", "app_code": client_auth.APP_CODE,
+         "iss": "k0iro_auth", "iat": now, "exp": now + 3600},
+        client_auth.APP_SECRET, algorithm="HS256",
+    )
+
+
+class Stub(BaseHTTPRequestHandler):
+    """Stand-in /sso/validate answering with Stub.body (bytes) and Stub.status."""
+
+    protocol_version = "HTTP/1.1"
+    status = 200
+    body = b""
+    calls = 0
+
+    def do_POST(self):
+        Stub.calls += 1
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(Stub.status)
+        self.send_header("Content-Length", str(len(Stub.body)))
+        self.end_headers()
+        self.wfile.write(Stub.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def central(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(client_auth, "CENTRAL_AUTH_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    client_auth.token_cache.clear()
+    client_auth.breaker.reset()
+    Stub.status, Stub.body, Stub.calls = 200, b"", 0
+    yield Stub
+    server.shutdown()
+    client_auth.breaker.reset()
+
+
+def test_valid_payload_is_cached(central):
+    token = make_token(1)
+    central.body = json.dumps({"valid": True, "user_id": 1, "callsign": "K0T1"}).encode()
+
+    assert client_auth.validate_token_remote(token)["callsign"] == "K0T1"
+    assert client_auth.validate_token_remote(token)["callsign"] == "K0T1"
+    assert central.calls == 1
+
+
+def test_non_json_200_falls_back_to_local(central):
+    token = make_token(2)
+    central.body = b"<html>Bad gateway</html>"
+
+    for _ in range(client_auth.BREAKER_FAILURES):
+        payload = client_auth.validate_token_remote(token)
+        assert payload["callsign"] == "K0T2"  # verified locally
+    assert client_auth.breaker.is_open
+    assert client_auth.validate_token_remote(make_token(3))["callsign"] == "K0T3"
+    assert central.calls == client_auth.BREAKER_FAILURES
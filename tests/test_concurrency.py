@@ -0,0 +1,54 @@
+import threading
+import time
+
+from app.cache import current_version
+from app.importer import import_adif_file
+from app.models import QSO
+from app.standings import load_standings
+from tests.conftest import qso, write_adif
+
+
+def test_reader_is_not_blocked_by_an_open_import(app, tmp_path):
+    assert app.config["SQLITE_PRAGMAS"]["journal_mode"] == "WAL"
+    busy_timeout = app.config["SQLITE_PRAGMAS"]["busy_timeout"] / 1000
+
+    with app.app_context():
+        first = write_adif(tmp_path / "a.adi", "K0ABC", [qso("W1AW", "20250713 150000")])
+        import_adif_file(str(first), first.name)
+        before = (current_version(), load_standings())
+    assert before[1]
+
+    # Hold the import's write transaction open after its first batch
+    inserted = threading.Event()
+    release = threading.Event()
+
+    def progress(parsed, count):
+        inserted.set()
+        release.wait(10)
+
+    def run_import():
+        with app.app_context():
+            path = write_adif(tmp_path / "b.adi", "W0XYZ", [
+                qso("N0CALL", f"20250714 {hour:02d}0000") for hour in range(20)
+            ])
+            import_adif_file(str(path), path.name, progress=progress)
+
+    importer = threading.Thread(target=run_import)
+    importer.start()
+    try:
+        assert inserted.wait(10)
+        with app.app_context():
+            start = time.perf_counter()
+            seen = (current_version(), load_standings())
+            count = QSO.query.count()
+            elapsed = time.perf_counter() - start
+    finally:
+        release.set()
+        importer.join()
+
+    assert elapsed < busy_timeout
+    assert seen == before
+    assert count == 1
+
+    with app.app_context():
+        assert QSO.query.count() == 21
@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+from app.importer import import_adif_file
+from app.standings import compare_results, score_all
+from benchmarks.generate import generate_contest
+
+
+@pytest.fixture
+def contest(app, tmp_path):
+    """A seeded contest of 30 generated logs, imported."""
+    uploads = os.path.join(app.instance_path, "uploads")
+    os.makedirs(uploads, exist_ok=True)
+    with app.app_context():
+        for path in generate_contest(str(tmp_path / "logs"), operators=30, qsos=40, seed=7):
+            filename = os.path.basename(path)
+            shutil.copy(path, uploads)
+            import_adif_file(os.path.join(uploads, filename), filename)
+    return app
+
+
+def test_engines_agree(contest):
+    with contest.app_context():
+        expected = score_all("python")
+        assert len(expected) == 30
+
+        for actual in (score_all("columnar"), score_all("sql"), score_all("python", parallel=2)):
+            assert compare_results(expected, actual) == []
+
+
+def test_columnar_engine_needs_numpy_at_startup(tmp_path, monkeypatch):
+    from app import create_app
+
+    monkeypatch.setenv("SCORING_ENGINE", "columnar")
+    monkeypatch.setitem(sys.modules, "numpy", None)  # import numpy raises ImportError
+    with pytest.raises(RuntimeError, match="requires numpy"):
+        create_app(instance_path=str(tmp_path / "instance"))
@@ -0,0 +1,27 @@
+import os
+
+from app import create_app
+from tests.conftest import qso, run_jobs, write_adif
+from tests.test_reset import upload
+
+
+def test_review_page_shows_failed_import(app, admin, tmp_path):
+    path = write_adif(tmp_path / "a.adi", "K0ABC", [qso("W1AW", "20250713 150000")])
+    upload(admin, path, "a.adi")
+    admin.post("/admin/uploads/accept/a.adi")
+    os.remove(os.path.join(app.instance_path, "uploads", "a.adi"))
+    run_jobs(app)
+
+    page = admin.get("/admin/uploads").data
+    assert b"Import failed" in page
+    assert b"Upload a.adi no longer exists" in page
+    # Accept and Reject are offered again
+    assert b"/admin/uploads/accept/a.adi" in page
+
+
+def test_flask_command_does_not_start_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLASK_RUN_FROM_CLI", "true")
+    monkeypatch.delenv("IMPORT_WORKER")
+
+    app = create_app(instance_path=str(tmp_path / "instance"))
+    assert not app.config["IMPORT_WORKER"]
@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize("tag", ['"{}"', 'W/"{}"'], ids=["strong", "weak"])
+def test_revalidation_returns_304(app, tag):
+    client = app.test_client()
+    first = client.get("/api/leaderboard")
+    assert first.status_code == 200
+    etag = first.headers["ETag"].strip('"')
+
+    again = client.get("/api/leaderboard", headers={"If-None-Match": tag.format(etag)})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_other_etag_gets_the_standings(app):
+    response = app.test_client().get("/api/leaderboard", headers={"If-None-Match": 'W/"v0.0-json-0-old"'})
+    assert response.status_code == 200
+    assert response.get_json()["operators"] == []
@@ -0,0 +1,30 @@
+from app import db, leaderboard
+from app.importer import import_adif_file
+from tests.conftest import qso, write_adif
+
+
+def test_stream_limit_and_delta(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(leaderboard, "POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(leaderboard, "STREAM_SECONDS", 2.0)
+    app.config["LEADERS_STREAM_LIMIT"] = 1
+    client = app.test_client()
+
+    first = client.get("/leaders/stream", buffered=False)
+    assert first.status_code == 200
+    events = (chunk.decode() for chunk in first.response)
+    assert next(events).startswith("retry:")
+    assert "event: reset" in next(events)
+
+    # One process-wide stream slot is taken
+    assert client.get("/leaders/stream").status_code == 503
+
+    with app.app_context():
+        path = write_adif(tmp_path / "a.adi", "K0ABC", [qso("W1AW", "20250713 150000")])
+        import_adif_file(str(path), path.name)
+        db.session.commit()
+
+    event = next(events)
+    assert "event: delta" in event and "K0ABC" in event
+
+    first.close()
+    assert client.get("/leaders/stream").status_code == 200
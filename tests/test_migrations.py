@@ -0,0 +1,36 @@
+import multiprocessing
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from app.migrations import MIGRATIONS
+
+
+def boot(instance_path):
+    create_app(instance_path=instance_path)
+
+
+@pytest.mark.parametrize("existing", [False, True], ids=["empty", "version-0"])
+def test_workers_booting_together_migrate_once(tmp_path, existing):
+    instance = str(tmp_path / "instance")
+    if existing:
+        # A database whose migrations have not run yet
+        app = create_app(instance_path=instance)
+        with app.app_context():
+            db.session.execute(text("PRAGMA user_version = 0"))
+            db.session.commit()
+            db.engine.dispose()
+
+    # Started together, like gunicorn workers
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=boot, args=(instance,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    app = create_app(instance_path=instance)
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
@@ -0,0 +1,85 @@
+from sqlalchemy import text
+
+from app import create_app, db
+from app.importer import import_adif_file
+from app.models import QSO, Log, Operator, OperatorScore
+from app.standings import rescore_all
+from tests.conftest import qso, write_adif
+
+CONTACT = qso("W1AW", "20250713 150000")
+
+
+def import_logs(app, tmp_path, *operators):
+    with app.app_context():
+        for i, operator in enumerate(operators):
+            path = write_adif(tmp_path / f"log{i}.adi", operator, [CONTACT])
+            import_adif_file(str(path), path.name)
+
+
+def test_base_callsign():
+    assert Operator.base_callsign("k0abc/p") == "K0ABC"
+    assert Operator.base_callsign("K0ABC/QRP") == "K0ABC"
+    assert Operator.base_callsign("K0ABC/7") == "K0ABC"
+    assert Operator.base_callsign("K0ABC/QRP/7") == "K0ABC"
+    # Prefixes are never folded away, whichever part is longer
+    assert Operator.base_callsign("VE3/K0ABC") == "VE3/K0ABC"
+    assert Operator.base_callsign("VP2E/W1AW") == "VP2E/W1AW"
+    assert Operator.base_callsign("VP2E/K0ABC/P") == "VP2E/K0ABC"
+    assert Operator.base_callsign("KL7/W0A") == "KL7/W0A"
+
+
+def test_portable_log_does_not_duplicate_contact(app, tmp_path):
+    import_logs(app, tmp_path, "K0ABC", "K0ABC/P")
+
+    with app.app_context():
+        assert Log.query.count() == 2
+        assert Operator.query.count() == 1
+        assert QSO.query.count() == 1
+        assert OperatorScore.query.filter_by(operator="K0ABC").one().total_qsos == 1
+
+
+def test_migration_rekeys_and_drops_merged_duplicates(app, tmp_path):
+    import_logs(app, tmp_path, "K0ABC")
+
+    # Second log's copy stored under the pre-operator key (raw K0ABC/P)
+    with app.app_context():
+        original = QSO.query.one()
+        log = Log(operator_id=original.log.operator_id, operator="K0ABC/P", filename="p.adi")
+        db.session.add(log)
+        db.session.flush()
+        db.session.add(QSO(
+            log_id=log.id, call=original.call, band=original.band, mode=original.mode,
+            datetime_on=original.datetime_on, park_ref=original.park_ref,
+            natural_key=QSO.make_natural_key(
+                "K0ABC/P", original.call, original.band, original.mode, original.datetime_on
+            ),
+        ))
+        rescore_all()
+        db.session.commit()
+        assert OperatorScore.query.filter_by(operator="K0ABC").one().total_qsos == 2
+        db.session.execute(text("PRAGMA user_version = 8"))
+        db.session.commit()
+
+    app = create_app(instance_path=app.instance_path)
+    with app.app_context():
+        assert QSO.query.count() == 1
+        assert OperatorScore.query.filter_by(operator="K0ABC").one().total_qsos == 1
+
+
+def test_migration_splits_operators_merged_on_a_prefix(app, tmp_path):
+    import_logs(app, tmp_path, "VP2E/W1AW", "VP2E/K0ABC")
+
+    # Both logs under VP2E, as the longest-part rule resolved them
+    with app.app_context():
+        merged = Operator(callsign="VP2E")
+        db.session.add(merged)
+        db.session.flush()
+        Log.query.update({"operator_id": merged.id})
+        db.session.execute(text("PRAGMA user_version = 9"))
+        db.session.commit()
+
+    app = create_app(instance_path=app.instance_path)
+    with app.app_context():
+        assert sorted(o.callsign for o in Operator.query) == ["VP2E/K0ABC", "VP2E/W1AW"]
+        assert QSO.query.count() == 2
+        assert OperatorScore.query.filter_by(operator="VP2E/W1AW").one().total_qsos == 1
@@ -0,0 +1,34 @@
+import io
+
+from app.models import ImportJob, Log, Upload
+from tests.conftest import qso, run_jobs, write_adif
+
+
+def upload(client, path, name):
+    with open(path, "rb") as f:
+        data = {"adif_file": (io.BytesIO(f.read()), name)}
+    return client.post("/upload", data=data, content_type="multipart/form-data")
+
+
+def test_reupload_after_master_reset(app, admin, tmp_path):
+    path = write_adif(tmp_path / "a.adi", "K0ABC", [qso("W1AW", "20250713 150000")])
+
+    assert b"Uploaded a.adi" in upload(admin, path, "a.adi").data
+    admin.post("/admin/uploads/accept/a.adi")
+    run_jobs(app)
+    assert b"already been imported" in upload(admin, path, "a.adi").data
+
+    # A queued job that never ran is closed by the reset
+    with app.app_context():
+        from app.jobs import enqueue_rescore
+        enqueue_rescore()
+
+    response = admin.post("/admin/reset", data={"confirmation": "DELETE EVERYTHING"})
+    assert b"System reset complete" in response.data
+
+    with app.app_context():
+        assert Upload.query.count() == 0
+        assert Log.query.count() == 0
+        assert ImportJob.query.filter(ImportJob.status.in_(["queued", "running"])).count() == 0
+
+    assert b"Uploaded a.adi" in upload(admin, path, "a.adi").data